@@ -0,0 +1 @@
+"""Scale benchmarks for storage, workspace mutations, execution, and datasets."""
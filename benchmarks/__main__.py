@@ -0,0 +1,75 @@
+"""Command line entry point: ``python -m benchmarks run|compare``."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from .suite import BENCHMARKS, SCALES, compare, format_results, load_results, run_suite, write_results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Pair coding IDE benchmark suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and write machine-readable results")
+    run_parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    run_parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    run_parser.add_argument("--baseline", type=Path, help="Compare against this results file after running")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+    run_parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="Run in this process instead of one process per benchmark (peak RSS becomes cumulative)",
+    )
+    run_parser.add_argument("--timeout", type=float, help="Record an error for isolated benchmarks exceeding this many seconds")
+
+    compare_parser = subparsers.add_parser("compare", help="Flag regressions against a stored baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    subparsers.add_parser("list", help="List available benchmarks")
+    return parser
+
+
+def _report(baseline_path: Path, current: dict, threshold: float) -> int:
+    try:
+        regressions = compare(load_results(baseline_path), current, threshold=threshold)
+    except ValueError as exc:
+        sys.stderr.write(f"error: {exc}\n")
+        return 2
+    for regression in regressions:
+        sys.stdout.write(f"REGRESSION {regression.describe()}\n")
+    if not regressions:
+        sys.stdout.write(f"No regressions beyond {threshold:.0%} against {baseline_path}\n")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "list":
+        for name in BENCHMARKS:
+            sys.stdout.write(name + "\n")
+        return 0
+
+    if args.command == "run":
+        results = run_suite(
+            args.scale, only=args.only, seed=args.seed, isolate=not args.no_isolate, timeout=args.timeout
+        )
+        write_results(args.output, results)
+        sys.stdout.write(format_results(results) + "\n")
+        sys.stdout.write(f"Results written to {args.output}\n")
+        if args.baseline is not None:
+            return _report(args.baseline, results, args.threshold)
+        return 0
+
+    return _report(args.baseline, load_results(args.current), args.threshold)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
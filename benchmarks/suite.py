@@ -0,0 +1,413 @@
+"""Benchmark definitions, the isolated runner, and baseline comparison."""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from paircoding.datasets import DatasetRegistry
+from paircoding.executor import ExecutionEngine
+from paircoding.models import Cell
+from paircoding.storage import StorageEngine
+from paircoding.workspace import Workspace
+
+from . import workloads
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "smoke": {"cells": 200, "messages": 2_000, "csv_rows": 5_000, "runs": 100, "workers": 4, "samples": 5},
+    "small": {"cells": 10_000, "messages": 100_000, "csv_rows": 200_000, "runs": 2_000, "workers": 8, "samples": 10},
+    "medium": {
+        "cells": 50_000,
+        "messages": 500_000,
+        "csv_rows": 5_000_000,
+        "runs": 20_000,
+        "workers": 16,
+        "samples": 10,
+    },
+    "full": {
+        "cells": 100_000,
+        "messages": 1_000_000,
+        "csv_rows": 40_000_000,
+        "runs": 100_000,
+        "workers": 32,
+        "samples": 10,
+    },
+}
+
+
+@dataclass
+class Measurement:
+    """Raw output of one benchmark: per-operation latencies plus optional extras."""
+
+    latencies: List[float]
+    units: int = 0
+    unit: str = "ops"
+    wall: Optional[float] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+BenchmarkFunc = Callable[[Dict[str, int], Path, int], Measurement]
+BENCHMARKS: Dict[str, BenchmarkFunc] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFunc], BenchmarkFunc]:
+    def decorator(func: BenchmarkFunc) -> BenchmarkFunc:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def _timed(operation: Callable[[], Any], samples: int) -> List[float]:
+    latencies = []
+    for _ in range(samples):
+        start = perf_counter()
+        operation()
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+@benchmark("storage.save_state")
+def bench_save_state(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    state = workloads.build_state(scale["cells"], scale["messages"], seed)
+    storage = StorageEngine(workdir / "state.json")
+    latencies = _timed(lambda: storage.save_state(state), scale["samples"])
+    size = storage.path.stat().st_size
+    return Measurement(latencies, units=size * len(latencies), unit="bytes", extra={"state_bytes": size})
+
+
+@benchmark("storage.load_state")
+def bench_load_state(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    storage = StorageEngine(workdir / "state.json")
+    storage.save_state(workloads.build_state(scale["cells"], scale["messages"], seed))
+    size = storage.path.stat().st_size
+    latencies = _timed(storage.load_state, scale["samples"])
+    return Measurement(latencies, units=size * len(latencies), unit="bytes", extra={"state_bytes": size})
+
+
+def _workspace(scale: Dict[str, int], workdir: Path, seed: int) -> Workspace:
+    StorageEngine(workdir / "state.json").save_state(
+        workloads.build_state(scale["cells"], scale["messages"], seed)
+    )
+    return Workspace(workdir / "state.json")
+
+
+@benchmark("workspace.add_cell")
+def bench_add_cell(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    workspace = _workspace(scale, workdir, seed)
+    notebook_id = next(iter(workspace.state.notebooks))
+    latencies = _timed(lambda: workspace.add_cell(notebook_id, "code", "x = 1"), scale["samples"])
+    return Measurement(latencies, units=len(latencies))
+
+
+@benchmark("workspace.update_cell")
+def bench_update_cell(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    workspace = _workspace(scale, workdir, seed)
+    notebook = next(iter(workspace.state.notebooks.values()))
+    last_cell = notebook.cells[-1].id
+    latencies = _timed(lambda: workspace.update_cell(notebook.id, last_cell, "x = 2"), scale["samples"])
+    return Measurement(latencies, units=len(latencies))
+
+
+@benchmark("workspace.post_message")
+def bench_post_message(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    workspace = _workspace(scale, workdir, seed)
+    session_id = next(iter(workspace.state.sessions))
+    latencies = _timed(lambda: workspace.post_message(session_id, "Kai", "looks good"), scale["samples"])
+    return Measurement(latencies, units=len(latencies))
+
+
+@benchmark("executor.run_cell")
+def bench_run_cell(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    rng = random.Random(seed)
+    engine = ExecutionEngine()
+    registry = DatasetRegistry()
+    cells = [Cell(id=str(index), cell_type="code", source=workloads.cell_source(rng)) for index in range(scale["runs"])]
+    latencies = []
+    for index, cell in enumerate(cells):
+        start = perf_counter()
+        engine.run_cell(f"session-{index % 50}", cell, registry)
+        latencies.append(perf_counter() - start)
+    return Measurement(latencies, units=len(latencies))
+
+
+_WORKER_ENGINE: Optional[ExecutionEngine] = None
+
+
+def _run_cells_in_worker(sources: List[tuple[int, str]]) -> List[float]:
+    global _WORKER_ENGINE
+    if _WORKER_ENGINE is None:
+        _WORKER_ENGINE = ExecutionEngine()
+    registry = DatasetRegistry()
+    latencies = []
+    for index, source in sources:
+        start = perf_counter()
+        _WORKER_ENGINE.run_cell(f"session-{index}", Cell(id=str(index), cell_type="code", source=source), registry)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+@benchmark("executor.multiprocess_run_cell")
+def bench_multiprocess_run_cell(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    """Cells spread over worker processes, each owning one engine.
+
+    ``ExecutionEngine.run_cell`` redirects the process-wide ``sys.stdout``, so
+    it must not be called from several threads at once; scaling out uses
+    processes, as a multi-worker deployment would.
+    """
+
+    rng = random.Random(seed)
+    sources = [(index, workloads.cell_source(rng)) for index in range(scale["runs"])]
+    workers = scale["workers"]
+    chunks = [sources[offset::workers] for offset in range(workers)]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Start every worker before timing so interpreter startup is not measured.
+        list(pool.map(_run_cells_in_worker, [[] for _ in range(workers)]))
+        start = perf_counter()
+        latencies = [latency for chunk in pool.map(_run_cells_in_worker, chunks) for latency in chunk]
+        wall = perf_counter() - start
+    return Measurement(latencies, units=len(latencies), wall=wall, extra={"workers": workers})
+
+
+def _csv_registry(scale: Dict[str, int], workdir: Path, seed: int) -> tuple[DatasetRegistry, int]:
+    path = workdir / "data.csv"
+    size = workloads.write_csv(path, scale["csv_rows"], seed=seed)
+    registry = DatasetRegistry(database_path=workdir / "datasets.sqlite")
+    registry.register("data", path)
+    return registry, size
+
+
+@benchmark("datasets.preview_rows")
+def bench_preview_rows(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    registry, size = _csv_registry(scale, workdir, seed)
+    latencies = _timed(lambda: registry.preview_rows("data", limit=20), scale["samples"])
+    return Measurement(latencies, units=len(latencies), extra={"csv_bytes": size})
+
+
+@benchmark("datasets.column_summary")
+def bench_column_summary(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    registry, size = _csv_registry(scale, workdir, seed)
+    latencies = _timed(lambda: registry.column_summary("data"), max(1, scale["samples"] // 5))
+    return Measurement(latencies, units=size * len(latencies), unit="bytes", extra={"csv_bytes": size})
+
+
+@benchmark("datasets.column_summary_projected")
+def bench_column_summary_projected(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    registry, size = _csv_registry(scale, workdir, seed)
+    columns = ["num_0", "num_3", "num_5"]
+    latencies = _timed(lambda: registry.column_summary("data", columns=columns), max(1, scale["samples"] // 5))
+    return Measurement(latencies, units=size * len(latencies), unit="bytes", extra={"csv_bytes": size})
+
+
+@benchmark("datasets.query")
+def bench_query(scale: Dict[str, int], workdir: Path, seed: int) -> Measurement:
+    registry, size = _csv_registry(scale, workdir, seed)
+    start = perf_counter()
+    registry.engine.ensure_ingested(registry.get("data"))
+    ingest = perf_counter() - start
+    sql = "SELECT text_0, AVG(num_0), COUNT(*) FROM data GROUP BY text_0"
+    latencies = _timed(lambda: registry.query(sql), scale["samples"])
+    return Measurement(latencies, units=len(latencies), extra={"csv_bytes": size, "ingest_seconds": ingest})
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[position]
+
+
+def run_benchmark(name: str, scale: str, seed: int = 0) -> Dict[str, Any]:
+    """Run one benchmark in the current process and summarize it."""
+
+    with tempfile.TemporaryDirectory(prefix="pairide-bench-") as workdir:
+        rss_before = _peak_rss_bytes()
+        start = perf_counter()
+        measurement = BENCHMARKS[name](SCALES[scale], Path(workdir), seed)
+        elapsed = perf_counter() - start
+        peak = _peak_rss_bytes()
+
+    latencies = measurement.latencies
+    busy = measurement.wall if measurement.wall is not None else sum(latencies)
+    return {
+        "operations": len(latencies),
+        "elapsed_seconds": elapsed,
+        "throughput": measurement.units / busy if busy else 0.0,
+        "throughput_unit": f"{measurement.unit}/s",
+        "latency": {
+            "mean": statistics.fmean(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+        },
+        "peak_rss_bytes": peak,
+        "rss_growth_bytes": max(0, peak - rss_before),
+        "extra": measurement.extra or {},
+    }
+
+
+def _isolated(name: str, scale: str, seed: int, connection: Connection) -> None:
+    try:
+        connection.send(run_benchmark(name, scale, seed))
+    except BaseException as exc:  # noqa: BLE001 reported to the parent
+        connection.send({"error": f"{exc.__class__.__name__}: {exc}"})
+    finally:
+        connection.close()
+
+
+def _run_isolated(context: Any, name: str, scale: str, seed: int, timeout: Optional[float]) -> Dict[str, Any]:
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_isolated, args=(name, scale, seed, sender))
+    process.start()
+    sender.close()
+    try:
+        # The sentinel fires if the child dies without reporting, e.g. when OOM-killed.
+        wait([receiver, process.sentinel], timeout=timeout)
+        if receiver.poll():
+            try:
+                return receiver.recv()
+            except EOFError:
+                pass
+        if process.is_alive():
+            process.kill()
+            process.join()
+            return {"error": f"Timed out after {timeout:g}s"}
+        process.join()
+        return {"error": f"Benchmark process exited with code {process.exitcode}"}
+    finally:
+        process.join()
+        receiver.close()
+
+
+def run_suite(
+    scale: str = "small",
+    only: Optional[Sequence[str]] = None,
+    seed: int = 0,
+    isolate: bool = True,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run the selected benchmarks; with ``isolate`` each gets a fresh process so peak RSS is its own.
+
+    An isolated benchmark that crashes, is killed, or exceeds ``timeout``
+    seconds is recorded as an ``error`` result and the suite moves on.
+    """
+
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale {scale!r}; choose from {sorted(SCALES)}")
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}")
+
+    results: Dict[str, Any] = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        if not isolate:
+            results[name] = run_benchmark(name, scale, seed)
+            continue
+        results[name] = _run_isolated(context, name, scale, seed, timeout)
+
+    return {
+        "meta": {
+            "scale": scale,
+            "parameters": SCALES[scale],
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+@dataclass
+class Regression:
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else float("inf")
+
+    def describe(self) -> str:
+        return f"{self.benchmark}: {self.metric} {self.baseline:.6g} -> {self.current:.6g} ({self.change:+.1%})"
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    min_seconds: float = 0.001,
+) -> List[Regression]:
+    """Flag metrics that got worse than ``baseline`` by more than ``threshold``.
+
+    Latencies below ``min_seconds`` in both runs are treated as noise. Runs
+    at different scales are not comparable and raise ``ValueError``.
+    """
+
+    for key in ("scale", "parameters"):
+        before, after = baseline.get("meta", {}).get(key), current.get("meta", {}).get(key)
+        if before is not None and after is not None and before != after:
+            raise ValueError(f"Cannot compare runs with different {key}: baseline {before!r}, current {after!r}")
+
+    regressions: List[Regression] = []
+    for name, new in current.get("results", {}).items():
+        old = baseline.get("results", {}).get(name)
+        if not old or "error" in old or "error" in new:
+            continue
+        for metric in ("p50", "p95"):
+            before, after = old["latency"][metric], new["latency"][metric]
+            if max(before, after) >= min_seconds and after > before * (1 + threshold):
+                regressions.append(Regression(name, f"latency.{metric}", before, after))
+        if new["throughput"] < old["throughput"] * (1 - threshold):
+            regressions.append(Regression(name, "throughput", old["throughput"], new["throughput"]))
+        if new["peak_rss_bytes"] > old["peak_rss_bytes"] * (1 + threshold):
+            regressions.append(Regression(name, "peak_rss_bytes", old["peak_rss_bytes"], new["peak_rss_bytes"]))
+    return regressions
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def write_results(path: Path, results: Dict[str, Any]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"{'benchmark':<36} {'ops':>7} {'p50 ms':>10} {'p95 ms':>10} {'throughput':>22} {'peak RSS MB':>12}"]
+    for name, data in results.get("results", {}).items():
+        if "error" in data:
+            lines.append(f"{name:<36} ERROR {data['error']}")
+            continue
+        throughput = f"{data['throughput']:.4g} {data['throughput_unit']}"
+        lines.append(
+            f"{name:<36} {data['operations']:>7} {data['latency']['p50'] * 1e3:>10.3f} "
+            f"{data['latency']['p95'] * 1e3:>10.3f} {throughput:>22} {data['peak_rss_bytes'] / 2**20:>12.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,95 @@
+"""Deterministic synthetic workloads for the benchmark suite."""
+
+from __future__ import annotations
+
+import csv
+import random
+import uuid
+from pathlib import Path
+from typing import List
+
+from paircoding.models import (
+    Cell,
+    ChatMessage,
+    Collaborator,
+    ExecutionResult,
+    Notebook,
+    Session,
+    WorkspaceState,
+)
+
+_WORDS = "data model metric cohort lift variance baseline control treatment funnel".split()
+_TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def _id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def cell_source(rng: random.Random) -> str:
+    name = rng.choice(_WORDS)
+    return f"{name}_{rng.randrange(1000)} = sum(range({rng.randrange(1, 200)}))\nprint({name!r})\n"
+
+
+def build_notebook(cells: int, seed: int = 0, with_results: bool = True) -> Notebook:
+    """A notebook with ``cells`` code cells, half of them carrying a last result."""
+
+    rng = random.Random(seed)
+    notebook = Notebook(id=_id(rng), title="Benchmark notebook", description="synthetic")
+    for index in range(cells):
+        result = None
+        if with_results and index % 2 == 0:
+            result = ExecutionResult(
+                success=True,
+                stdout=rng.choice(_WORDS) + "\n",
+                error=None,
+                duration=rng.random() / 100,
+                timestamp=_TIMESTAMP,
+                variables=["value"],
+                variable_sizes={"value": 28},
+            )
+        notebook.cells.append(Cell(id=_id(rng), cell_type="code", source=cell_source(rng), last_result=result))
+    return notebook
+
+
+def build_session(notebook_id: str, messages: int, seed: int = 0) -> Session:
+    """A session with three collaborators and ``messages`` chat messages."""
+
+    rng = random.Random(seed)
+    people = [Collaborator(id=_id(rng), name=name, role="navigator") for name in ("Kai", "Sky", "Ari")]
+    chat = [
+        ChatMessage(
+            author=rng.choice(people).name,
+            content=" ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 15))),
+            timestamp=_TIMESTAMP,
+        )
+        for _ in range(messages)
+    ]
+    return Session(id=_id(rng), name="Benchmark", notebook_id=notebook_id, collaborators=people, chat=chat)
+
+
+def build_state(cells: int, messages: int, seed: int = 0) -> WorkspaceState:
+    notebook = build_notebook(cells, seed)
+    session = build_session(notebook.id, messages, seed + 1)
+    return WorkspaceState(notebooks={notebook.id: notebook}, sessions={session.id: session})
+
+
+def write_csv(path: Path, rows: int, numeric_columns: int = 6, text_columns: int = 2, seed: int = 0) -> int:
+    """Stream a CSV of ``rows`` rows to ``path`` and return its size in bytes."""
+
+    rng = random.Random(seed)
+    headers: List[str] = [f"num_{index}" for index in range(numeric_columns)]
+    headers += [f"text_{index}" for index in range(text_columns)]
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(headers)
+        batch = []
+        for _ in range(rows):
+            row: List[object] = [round(rng.gauss(100, 15), 3) for _ in range(numeric_columns)]
+            row += [rng.choice(_WORDS) for _ in range(text_columns)]
+            batch.append(row)
+            if len(batch) == 10000:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+    return path.stat().st_size
@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
 from pathlib import Path
 
+from .telemetry import PrometheusExporter, Telemetry, format_stats, prometheus_text, telemetry
 from .workspace import Workspace
 
 
@@ -18,6 +20,17 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path(".pairide/state.json"),
         help="Path to the workspace state file",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record timings for this command into the profile shown by 'stats'",
+    )
+    parser.add_argument("--trace", type=Path, help="Append span records to this JSONL file (implies --profile)")
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write the accumulated profile as Prometheus text to this file (implies --profile)",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -66,10 +79,68 @@ def build_parser() -> argparse.ArgumentParser:
     dataset_parser.add_argument("name")
     dataset_parser.add_argument("path", type=Path)
     dataset_parser.add_argument("--description", default="")
+    dataset_parser.add_argument(
+        "--index",
+        action="append",
+        metavar="COLUMNS",
+        help="Declare an index for SQL queries; comma-separate columns for a composite index",
+    )
+    dataset_parser.add_argument(
+        "--format",
+        default=None,
+        help="Dataset format (csv, csv.gz, csv.bz2, csv.xz, parquet, arrow); inferred from the suffix by default",
+    )
 
     preview_parser = subparsers.add_parser("preview-dataset", help="Preview rows from a dataset")
     preview_parser.add_argument("name")
     preview_parser.add_argument("--limit", type=int, default=5)
+    preview_parser.add_argument("--column", action="append", help="Only read the given columns")
+
+    summary_parser = subparsers.add_parser("summarize-dataset", help="Summarize numeric columns")
+    summary_parser.add_argument("name")
+    summary_parser.add_argument("--column", action="append", help="Only read the given columns")
+
+    query_parser = subparsers.add_parser("query", help="Run SQL against registered datasets")
+    query_parser.add_argument("sql")
+    query_parser.add_argument("--limit", type=int, default=100)
+    query_parser.add_argument("--offset", type=int, default=0)
+    query_parser.add_argument("--explain", action="store_true", help="Include the query plan")
+
+    stats_parser = subparsers.add_parser("stats", help="Print the collected profile")
+    stats_parser.add_argument("--format", choices=["table", "json", "prometheus"], default="table")
+    stats_parser.add_argument("--reset", action="store_true", help="Discard the collected profile")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the real-time collaboration server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--save-interval", type=float, default=1.0)
+    serve_parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help="Bytes of session variables to keep resident before idle sessions spill to disk",
+    )
+
+    grade_parser = subparsers.add_parser("grade", help="Grade submissions against test cases in parallel")
+    grade_parser.add_argument("submissions", type=Path, help="Directory of .py files or a JSON list of submissions")
+    grade_parser.add_argument("cases", type=Path, help="JSON list of test cases")
+    grade_parser.add_argument("--workers", type=int, help="Worker processes (defaults to the CPU count)")
+    grade_parser.add_argument("--timeout", type=float, default=5.0, help="Per-case timeout in seconds")
+    grade_parser.add_argument("--setup", type=Path, help="Python file run once per worker to load fixtures")
+    grade_parser.add_argument("--output", type=Path, help="Write the full report here instead of stdout")
+
+    plan_parser = subparsers.add_parser("plan", help="Size an experiment over a grid of planning parameters")
+    plan_parser.add_argument("--baseline", type=float, nargs="+", required=True, help="Control conversion rates")
+    plan_parser.add_argument("--mde", type=float, nargs="+", required=True, help="Minimum detectable lifts")
+    plan_parser.add_argument("--relative", action="store_true", help="Treat --mde as lifts relative to the baseline")
+    plan_parser.add_argument("--allocation", type=float, nargs="+", default=[0.5], help="Treatment share of traffic")
+    plan_parser.add_argument("--alpha", type=float, nargs="+", default=[0.05])
+    plan_parser.add_argument("--power", type=float, nargs="+", default=[0.8])
+    plan_parser.add_argument("--looks", type=int, nargs="+", default=[1], help="Equally spaced analyses")
+    plan_parser.add_argument("--spending", choices=["obrien-fleming", "pocock"], help="Alpha spending for interim looks")
+    plan_parser.add_argument("--one-sided", action="store_true")
+    plan_parser.add_argument("--daily-traffic", type=float, help="Eligible visitors per day, for projected durations")
+    plan_parser.add_argument("--limit", type=int, default=100, help="Maximum scenarios to print")
+    plan_parser.add_argument("--simulate", type=int, default=0, help="Cross-check this many scenarios by simulation")
 
     return parser
 
@@ -90,11 +161,64 @@ def _parse_collaborators(raw_values: list[str] | None) -> list[tuple[str, str]]:
     return collaborators
 
 
+def _profile_path(state: Path) -> Path:
+    return state.parent / "profile.json"
+
+
+def _load_profile(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _record_profile(path: Path, metrics_path: Path | None) -> None:
+    combined = Telemetry()
+    combined.merge(_load_profile(path))
+    combined.merge(telemetry.stats())
+    stats = combined.stats()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(stats))
+    if metrics_path is not None:
+        PrometheusExporter(metrics_path).write(stats)
+
+
+def _show_stats(args: argparse.Namespace) -> int:
+    path = _profile_path(args.state)
+    if args.reset:
+        path.unlink(missing_ok=True)
+        _print_json({"status": "reset"})
+        return 0
+    stats = _load_profile(path)
+    if args.format == "json":
+        _print_json(stats)
+    elif args.format == "prometheus":
+        sys.stdout.write(prometheus_text(stats))
+    else:
+        sys.stdout.write(format_stats(stats) + "\n")
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
-    workspace = Workspace(args.state)
-
+    if args.command == "stats":
+        return _show_stats(args)
+
+    profiling = bool(args.profile or args.trace or args.metrics or telemetry.enabled)
+    if profiling:
+        telemetry.enable(trace_path=args.trace)
+    try:
+        with telemetry.span(f"cli.{args.command}"):
+            workspace = Workspace(args.state)
+            return _run_command(parser, args, workspace)
+    finally:
+        if profiling:
+            _record_profile(_profile_path(args.state), args.metrics)
+            telemetry.reset()
+            telemetry.disable()
+
+
+def _run_command(parser: argparse.ArgumentParser, args: argparse.Namespace, workspace: Workspace) -> int:
     if args.command == "init":
         notebook = workspace.create_notebook(args.title, args.description)
         _print_json({"notebook_id": notebook.id})
@@ -141,15 +265,71 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     if args.command == "register-dataset":
-        workspace.register_dataset(args.name, args.path, args.description)
+        workspace.register_dataset(args.name, args.path, args.description, args.index, args.format)
         _print_json({"status": "registered", "name": args.name, "path": str(args.path)})
         return 0
 
     if args.command == "preview-dataset":
-        preview = workspace.preview_dataset(args.name, args.limit)
+        preview = workspace.preview_dataset(args.name, args.limit, args.column)
         _print_json(preview)
         return 0
 
+    if args.command == "summarize-dataset":
+        _print_json(workspace.dataset_summary(args.name, args.column))
+        return 0
+
+    if args.command == "query":
+        page = workspace.query(args.sql, limit=args.limit, offset=args.offset, explain=args.explain)
+        _print_json(page)
+        return 0
+
+    if args.command == "serve":
+        from .collab import CollaborationServer
+
+        workspace.executor.memory_budget = args.memory_budget
+        server = CollaborationServer(
+            workspace, host=args.host, port=args.port, save_interval=args.save_interval
+        )
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command == "grade":
+        from .grading import Grader, load_cases, load_submissions
+
+        setup_source = args.setup.read_text() if args.setup else ""
+        with Grader(workers=args.workers, timeout=args.timeout, setup_source=setup_source) as grader:
+            report = grader.grade(load_submissions(args.submissions), load_cases(args.cases))
+        if args.output is None:
+            _print_json(report.to_dict())
+        else:
+            args.output.write_text(json.dumps(report.to_dict(), indent=2))
+            _print_json(report.summary())
+        return 0
+
+    if args.command == "plan":
+        from .planning import cross_check, sample_size_grid
+
+        plan = sample_size_grid(
+            args.baseline,
+            args.mde,
+            args.allocation,
+            args.alpha,
+            args.power,
+            args.looks,
+            relative=args.relative,
+            two_sided=not args.one_sided,
+            spending=args.spending,
+            daily_traffic=args.daily_traffic,
+        )
+        payload: dict[str, object] = {"scenarios": plan.size, "plan": plan.to_records(limit=args.limit)}
+        if args.simulate:
+            payload["cross_check"] = cross_check(plan, scenarios=args.simulate)
+        _print_json(payload)
+        return 0
+
     parser.error(f"Unknown command {args.command}")
     return 1
 
@@ -0,0 +1,613 @@
+"""Real-time collaboration server pushing cell deltas, chat, and results.
+
+The wire protocol is newline-delimited JSON over TCP. Cell edits travel as
+operational-transform operations: a list whose items are a positive int
+(retain), a negative int (delete), or a string (insert), so a frame's size is
+proportional to the edit rather than the cell. The server is the single
+source of ordering: it transforms each incoming operation against everything
+applied since the client's base version, bumps the cell version, acknowledges
+the author, and broadcasts the transformed operation to every other peer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from .models import Cell
+from .telemetry import telemetry
+from .workspace import Workspace
+
+Component = Union[int, str]
+
+_FRAME_LIMIT = 1 << 20
+_WRITE_BUFFER_LIMIT = 4 << 20
+_CHAT_BACKLOG = 50
+
+
+class TextOperation:
+    """A sequence of retain/insert/delete components over a text document."""
+
+    def __init__(self) -> None:
+        self.ops: List[Component] = []
+        self.base_length = 0
+        self.target_length = 0
+
+    @staticmethod
+    def _is_retain(op: Any) -> bool:
+        return isinstance(op, int) and op > 0
+
+    @staticmethod
+    def _is_delete(op: Any) -> bool:
+        return isinstance(op, int) and op < 0
+
+    @staticmethod
+    def _is_insert(op: Any) -> bool:
+        return isinstance(op, str)
+
+    def retain(self, count: int) -> "TextOperation":
+        if count <= 0:
+            return self
+        self.base_length += count
+        self.target_length += count
+        if self.ops and self._is_retain(self.ops[-1]):
+            self.ops[-1] += count
+        else:
+            self.ops.append(count)
+        return self
+
+    def insert(self, text: str) -> "TextOperation":
+        if not text:
+            return self
+        self.target_length += len(text)
+        if self.ops and self._is_insert(self.ops[-1]):
+            self.ops[-1] += text
+        elif self.ops and self._is_delete(self.ops[-1]):
+            # Keep inserts before deletes so equal operations compare equal.
+            if len(self.ops) > 1 and self._is_insert(self.ops[-2]):
+                self.ops[-2] += text
+            else:
+                self.ops.insert(len(self.ops) - 1, text)
+        else:
+            self.ops.append(text)
+        return self
+
+    def delete(self, count: int) -> "TextOperation":
+        count = abs(count)
+        if count == 0:
+            return self
+        self.base_length += count
+        if self.ops and self._is_delete(self.ops[-1]):
+            self.ops[-1] -= count
+        else:
+            self.ops.append(-count)
+        return self
+
+    @classmethod
+    def splice(cls, length: int, position: int, delete: int = 0, insert: str = "") -> "TextOperation":
+        """Build the operation replacing ``delete`` characters at ``position`` with ``insert``."""
+
+        if not 0 <= position <= length or delete < 0 or position + delete > length:
+            raise ValueError("Splice is outside the document")
+        return cls().retain(position).delete(delete).insert(insert).retain(length - position - delete)
+
+    @classmethod
+    def from_json(cls, components: List[Component]) -> "TextOperation":
+        operation = cls()
+        for component in components:
+            if isinstance(component, bool) or not isinstance(component, (int, str)):
+                raise ValueError(f"Invalid operation component {component!r}")
+            if cls._is_insert(component):
+                operation.insert(component)
+            elif component > 0:
+                operation.retain(component)
+            else:
+                operation.delete(component)
+        return operation
+
+    def to_json(self) -> List[Component]:
+        return list(self.ops)
+
+    def apply(self, document: str) -> str:
+        if len(document) != self.base_length:
+            raise ValueError("Operation base length does not match the document")
+        pieces: List[str] = []
+        cursor = 0
+        for op in self.ops:
+            if self._is_retain(op):
+                pieces.append(document[cursor : cursor + op])
+                cursor += op
+            elif self._is_insert(op):
+                pieces.append(op)
+            else:
+                cursor -= op
+        return "".join(pieces)
+
+    def compose(self, other: "TextOperation") -> "TextOperation":
+        """Return one operation equivalent to applying ``self`` then ``other``."""
+
+        if self.target_length != other.base_length:
+            raise ValueError("Operations cannot be composed")
+        result = TextOperation()
+        first, second = iter(self.ops), iter(other.ops)
+        op1, op2 = next(first, None), next(second, None)
+        while op1 is not None or op2 is not None:
+            if self._is_delete(op1):
+                result.delete(op1)
+                op1 = next(first, None)
+                continue
+            if self._is_insert(op2):
+                result.insert(op2)
+                op2 = next(second, None)
+                continue
+            if op1 is None or op2 is None:
+                raise ValueError("Operations cannot be composed")
+            if self._is_retain(op1) and self._is_retain(op2):
+                step = min(op1, op2)
+                result.retain(step)
+                op1 = op1 - step or next(first, None)
+                op2 = op2 - step or next(second, None)
+            elif self._is_insert(op1) and self._is_delete(op2):
+                step = min(len(op1), -op2)
+                op1 = op1[step:] or next(first, None)
+                op2 = op2 + step or next(second, None)
+            elif self._is_insert(op1) and self._is_retain(op2):
+                step = min(len(op1), op2)
+                result.insert(op1[:step])
+                op1 = op1[step:] or next(first, None)
+                op2 = op2 - step or next(second, None)
+            else:  # retain then delete
+                step = min(op1, -op2)
+                result.delete(step)
+                op1 = op1 - step or next(first, None)
+                op2 = op2 + step or next(second, None)
+        return result
+
+    @staticmethod
+    def transform(left: "TextOperation", right: "TextOperation") -> Tuple["TextOperation", "TextOperation"]:
+        """Return ``(left', right')`` so that ``left + right' == right + left'``.
+
+        Concurrent inserts at the same position place ``left``'s text first.
+        """
+
+        if left.base_length != right.base_length:
+            raise ValueError("Operations were not made against the same document")
+        left_prime, right_prime = TextOperation(), TextOperation()
+        first, second = iter(left.ops), iter(right.ops)
+        op1, op2 = next(first, None), next(second, None)
+        is_retain, is_delete, is_insert = (
+            TextOperation._is_retain,
+            TextOperation._is_delete,
+            TextOperation._is_insert,
+        )
+        while op1 is not None or op2 is not None:
+            if is_insert(op1):
+                left_prime.insert(op1)
+                right_prime.retain(len(op1))
+                op1 = next(first, None)
+                continue
+            if is_insert(op2):
+                left_prime.retain(len(op2))
+                right_prime.insert(op2)
+                op2 = next(second, None)
+                continue
+            if op1 is None or op2 is None:
+                raise ValueError("Operations cannot be transformed")
+            if is_retain(op1) and is_retain(op2):
+                step = min(op1, op2)
+                left_prime.retain(step)
+                right_prime.retain(step)
+                op1 = op1 - step or next(first, None)
+                op2 = op2 - step or next(second, None)
+            elif is_delete(op1) and is_delete(op2):
+                step = min(-op1, -op2)
+                op1 = op1 + step or next(first, None)
+                op2 = op2 + step or next(second, None)
+            elif is_delete(op1) and is_retain(op2):
+                step = min(-op1, op2)
+                left_prime.delete(step)
+                op1 = op1 + step or next(first, None)
+                op2 = op2 - step or next(second, None)
+            else:  # retain against delete
+                step = min(op1, -op2)
+                right_prime.delete(step)
+                op1 = op1 - step or next(first, None)
+                op2 = op2 + step or next(second, None)
+        return left_prime, right_prime
+
+
+@dataclass
+class _CellDocument:
+    notebook_id: str
+    source: str
+    version: int = 0
+    history: List[TextOperation] = field(default_factory=list)
+
+    @property
+    def history_base(self) -> int:
+        return self.version - len(self.history)
+
+
+class _Peer:
+    """One connected client whose outbound events are written in batches.
+
+    Remote operations are deliberately not composed here: clients transform
+    their pending edits against each server operation, and composing would
+    change how concurrent inserts at the same position are ordered.
+    """
+
+    def __init__(self, server: "CollaborationServer", writer: asyncio.StreamWriter, session_id: str, name: str):
+        self.server = server
+        self.writer = writer
+        self.session_id = session_id
+        self.name = name
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_scheduled = False
+
+    def send(self, event: Dict[str, Any]) -> None:
+        self._pending.append(event)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(self.server.coalesce_delay, self.flush)
+
+    def flush(self) -> None:
+        self._flush_scheduled = False
+        events, self._pending = self._pending, []
+        if self.writer.is_closing() or not events:
+            return
+        self.writer.write("".join(json.dumps(event) + "\n" for event in events).encode("utf-8"))
+        if self.writer.transport.get_write_buffer_size() > _WRITE_BUFFER_LIMIT:
+            # A client this far behind cannot catch up; it must rejoin for a fresh snapshot.
+            self.writer.close()
+
+
+class CollaborationServer:
+    """Serves one workspace to many clients over newline-delimited JSON frames.
+
+    Edits are applied to the workspace in memory and written to disk at most
+    every ``save_interval`` seconds, so a burst of keystrokes does not rewrite
+    the state file each time. Outbound events are buffered for
+    ``coalesce_delay`` seconds per client and written together; bursts of
+    keystrokes are also composed client-side while an edit awaits its
+    acknowledgement (see :class:`CollabClient`). Cells run one at a time on a
+    worker thread so the event loop keeps serving edits meanwhile.
+    """
+
+    def __init__(
+        self,
+        workspace: Workspace,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        coalesce_delay: float = 0.01,
+        save_interval: float = 1.0,
+        history_limit: int = 1000,
+    ):
+        self.workspace = workspace
+        self.host = host
+        self.port = port
+        self.coalesce_delay = coalesce_delay
+        self.save_interval = save_interval
+        self.history_limit = history_limit
+        self._documents: Dict[str, _CellDocument] = {}
+        self._peers: Dict[str, List[_Peer]] = {}
+        self._dirty = False
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._saver: Optional[asyncio.Task] = None
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pairide-run")
+        self._tasks: Set[asyncio.Task] = set()
+        self._handlers: Set[asyncio.Task] = set()
+
+    async def start(self) -> Tuple[str, int]:
+        self.workspace.auto_save = False
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=_FRAME_LIMIT)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        self._saver = asyncio.create_task(self._save_periodically())
+        return self.host, self.port
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._saver is not None:
+            self._saver.cancel()
+            self._saver = None
+        for task in list(self._tasks):
+            await task
+        if self._server is not None:
+            self._server.close()
+        for peers in self._peers.values():
+            for peer in peers:
+                peer.flush()
+                peer.writer.close()
+        self._peers.clear()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        self._runner.shutdown(wait=True)
+        self._save_if_dirty()
+        self.workspace.executor.close()
+
+    def _save_if_dirty(self) -> None:
+        if self._dirty:
+            self._dirty = False
+            self.workspace.save()
+
+    async def _save_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.save_interval)
+            self._save_if_dirty()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = asyncio.current_task()
+        if handler is not None:
+            self._handlers.add(handler)
+        peer: Optional[_Peer] = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The oversized frame cannot be skipped reliably; drop the client.
+                    writer.write((json.dumps({"type": "error", "message": "Frame too large"}) + "\n").encode("utf-8"))
+                    break
+                if not line:
+                    break
+                try:
+                    frame = json.loads(line)
+                    if not isinstance(frame, dict):
+                        raise ValueError("Frames must be JSON objects")
+                    if peer is None:
+                        peer = self._join(frame, writer)
+                    else:
+                        await self._dispatch(peer, frame)
+                except (KeyError, ValueError, TypeError) as exc:
+                    error = {"type": "error", "message": f"{exc.__class__.__name__}: {exc}"}
+                    if peer is None:
+                        writer.write((json.dumps(error) + "\n").encode("utf-8"))
+                    else:
+                        peer.send(error)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if peer is not None and peer in self._peers.get(peer.session_id, []):
+                self._peers[peer.session_id].remove(peer)
+            writer.close()
+            self._handlers.discard(handler)
+
+    def _join(self, frame: Dict[str, Any], writer: asyncio.StreamWriter) -> _Peer:
+        if frame.get("type") != "join":
+            raise ValueError("The first frame must join a session")
+        session = self.workspace.get_session(frame["session_id"])
+        notebook = self.workspace.get_notebook(session.notebook_id)
+        peer = _Peer(self, writer, session.id, frame.get("name", "anonymous"))
+        self._peers.setdefault(session.id, []).append(peer)
+        cells = []
+        for cell in notebook.cells:
+            document = self._document(notebook.id, cell.id)
+            cells.append({"id": cell.id, "cell_type": cell.cell_type, "source": document.source, "version": document.version})
+        peer.send(
+            {
+                "type": "snapshot",
+                "session_id": session.id,
+                "notebook_id": notebook.id,
+                "cells": cells,
+                "chat": [message.to_dict() for message in session.chat[-_CHAT_BACKLOG:]],
+            }
+        )
+        return peer
+
+    def _document(self, notebook_id: str, cell_id: str) -> _CellDocument:
+        document = self._documents.get(cell_id)
+        if document is None:
+            cell = self.workspace.get_cell(notebook_id, cell_id)
+            document = _CellDocument(notebook_id=notebook_id, source=cell.source)
+            self._documents[cell_id] = document
+        elif document.notebook_id != notebook_id:
+            raise KeyError(f"Unknown cell {cell_id}")
+        return document
+
+    def _broadcast(self, session_id: str, event: Dict[str, Any], exclude: Optional[_Peer] = None) -> None:
+        for peer in self._peers.get(session_id, []):
+            if peer is not exclude:
+                peer.send(event)
+
+    async def _dispatch(self, peer: _Peer, frame: Dict[str, Any]) -> None:
+        kind = frame.get("type")
+        if kind == "edit":
+            self._edit(peer, frame)
+        elif kind == "chat":
+            message = self.workspace.post_message(peer.session_id, frame.get("author", peer.name), frame["content"])
+            self._dirty = True
+            self._broadcast(peer.session_id, {"type": "chat", **message.to_dict()})
+        elif kind == "run":
+            self._document(self.workspace.get_session(peer.session_id).notebook_id, frame["cell_id"])
+            # Run in the background so this client's edits keep flowing meanwhile.
+            task = asyncio.create_task(self._run(peer, frame["cell_id"]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            raise ValueError(f"Unknown frame type {kind!r}")
+
+    def _edit(self, peer: _Peer, frame: Dict[str, Any]) -> None:
+        session = self.workspace.get_session(peer.session_id)
+        document = self._document(session.notebook_id, frame["cell_id"])
+        base = int(frame["version"])
+        resync = {"type": "resync", "cell_id": frame["cell_id"], "source": document.source, "version": document.version}
+        if not document.history_base <= base <= document.version:
+            peer.send(resync)
+            return
+
+        try:
+            operation = TextOperation.from_json(frame["ops"])
+            for concurrent in document.history[base - document.history_base :]:
+                operation, _ = TextOperation.transform(operation, concurrent)
+            source = operation.apply(document.source)
+        except (TypeError, ValueError):
+            # The author's copy has diverged; resetting it also clears its pending edits.
+            telemetry.count("collab.rejected_edits")
+            peer.send(resync)
+            return
+        document.source = source
+        document.version += 1
+        document.history.append(operation)
+        telemetry.count("collab.edits")
+        del document.history[: -self.history_limit]
+
+        self.workspace.update_cell(document.notebook_id, frame["cell_id"], document.source)
+        self._dirty = True
+        peer.send({"type": "ack", "cell_id": frame["cell_id"], "version": document.version})
+        self._broadcast(
+            peer.session_id,
+            {
+                "type": "edit",
+                "cell_id": frame["cell_id"],
+                "version": document.version,
+                "ops": operation.to_json(),
+                "author": peer.name,
+            },
+            exclude=peer,
+        )
+
+    async def _run(self, peer: _Peer, cell_id: str) -> None:
+        session_id = peer.session_id
+        self._broadcast(session_id, {"type": "running", "cell_id": cell_id, "author": peer.name})
+        loop = asyncio.get_running_loop()
+        queued_at = perf_counter()
+
+        def run() -> Cell:
+            telemetry.observe("collab.run_queue_wait_seconds", perf_counter() - queued_at)
+            notebook_id = self.workspace.get_session(session_id).notebook_id
+            return self.workspace.run_cell(session_id, notebook_id, cell_id)
+
+        try:
+            cell = await loop.run_in_executor(self._runner, run)
+        except Exception as exc:  # noqa: BLE001 reported to the client instead of failing the task
+            telemetry.count("collab.run_errors")
+            peer.send({"type": "error", "cell_id": cell_id, "message": f"{exc.__class__.__name__}: {exc}"})
+            return
+        self._dirty = True
+        result = cell.last_result.to_dict() if cell.last_result else None
+        self._broadcast(session_id, {"type": "result", "cell_id": cell_id, "result": result})
+
+
+class CollabClient:
+    """Reference asyncio client that keeps local cell copies in sync.
+
+    Local edits apply immediately. At most one operation per cell is in flight;
+    edits made while waiting for its acknowledgement are composed into a
+    buffer and sent together, and incoming remote operations are transformed
+    against both.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.documents: Dict[str, str] = {}
+        self.versions: Dict[str, int] = {}
+        self.events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self._awaiting: Dict[str, TextOperation] = {}
+        self._buffer: Dict[str, TextOperation] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._joined: Optional[asyncio.Future] = None
+
+    async def connect(self, session_id: str, name: str) -> Dict[str, Any]:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=_FRAME_LIMIT)
+        self._joined = asyncio.get_running_loop().create_future()
+        self._listener = asyncio.create_task(self._listen())
+        self._send({"type": "join", "session_id": session_id, "name": name})
+        return await self._joined
+
+    @property
+    def synchronized(self) -> bool:
+        return not self._awaiting and not self._buffer
+
+    def edit(self, cell_id: str, position: int, delete: int = 0, insert: str = "") -> None:
+        operation = TextOperation.splice(len(self.documents[cell_id]), position, delete, insert)
+        self.documents[cell_id] = operation.apply(self.documents[cell_id])
+        if cell_id not in self._awaiting:
+            self._awaiting[cell_id] = operation
+            self._send_edit(cell_id, operation)
+        elif cell_id in self._buffer:
+            self._buffer[cell_id] = self._buffer[cell_id].compose(operation)
+        else:
+            self._buffer[cell_id] = operation
+
+    def chat(self, content: str, author: Optional[str] = None) -> None:
+        frame: Dict[str, Any] = {"type": "chat", "content": content}
+        if author is not None:
+            frame["author"] = author
+        self._send(frame)
+
+    def run(self, cell_id: str) -> None:
+        self._send({"type": "run", "cell_id": cell_id})
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._listener is not None:
+            self._listener.cancel()
+
+    def _send(self, frame: Dict[str, Any]) -> None:
+        assert self._writer is not None, "connect() first"
+        self._writer.write((json.dumps(frame) + "\n").encode("utf-8"))
+
+    def _send_edit(self, cell_id: str, operation: TextOperation) -> None:
+        self._send({"type": "edit", "cell_id": cell_id, "version": self.versions[cell_id], "ops": operation.to_json()})
+
+    async def _listen(self) -> None:
+        assert self._reader is not None
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            self._receive(json.loads(line))
+
+    def _receive(self, event: Dict[str, Any]) -> None:
+        kind = event["type"]
+        if kind == "snapshot":
+            for cell in event["cells"]:
+                self.documents[cell["id"]] = cell["source"]
+                self.versions[cell["id"]] = cell["version"]
+            if self._joined is not None and not self._joined.done():
+                self._joined.set_result(event)
+            return
+        if kind == "ack":
+            cell_id = event["cell_id"]
+            self.versions[cell_id] = event["version"]
+            del self._awaiting[cell_id]
+            buffered = self._buffer.pop(cell_id, None)
+            if buffered is not None:
+                self._awaiting[cell_id] = buffered
+                self._send_edit(cell_id, buffered)
+            return
+        if kind == "edit":
+            cell_id = event["cell_id"]
+            operation = TextOperation.from_json(event["ops"])
+            if cell_id in self._awaiting:
+                self._awaiting[cell_id], operation = TextOperation.transform(self._awaiting[cell_id], operation)
+                if cell_id in self._buffer:
+                    self._buffer[cell_id], operation = TextOperation.transform(self._buffer[cell_id], operation)
+            self.documents[cell_id] = operation.apply(self.documents[cell_id])
+            self.versions[cell_id] = event["version"]
+            return
+        if kind == "resync":
+            self.documents[event["cell_id"]] = event["source"]
+            self.versions[event["cell_id"]] = event["version"]
+            self._awaiting.pop(event["cell_id"], None)
+            self._buffer.pop(event["cell_id"], None)
+        self.events.put_nowait(event)
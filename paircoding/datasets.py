@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
-import csv
+import re
 import statistics
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
+from .formats import infer_format, open_reader, supported_formats
 from .models import DatasetReference
+from .shared import SharedColumnStore, SharedDataset, shared_store
+from .sql import QueryEngine, QueryPage
+from .telemetry import telemetry, traced
+
+
+SUMMARY_STATS = ("min", "max", "mean", "median", "count")
 
 
 class DatasetNotFoundError(KeyError):
@@ -26,19 +34,38 @@ class Preview:
 class DatasetRegistry:
     """Stores dataset metadata and simple statistical summaries."""
 
-    def __init__(self, entries: Optional[Dict[str, DatasetReference]] = None):
+    def __init__(
+        self,
+        entries: Optional[Dict[str, DatasetReference]] = None,
+        shared: Optional[SharedColumnStore] = None,
+        database_path: Optional[Path] = None,
+    ):
         self._datasets: Dict[str, DatasetReference] = entries or {}
-
-    def register(self, name: str, path: Path, description: str = "", format: str = "csv") -> DatasetReference:
+        self._shared = shared
+        self._database_path = database_path
+        self._engine: Optional[QueryEngine] = None
+
+    def register(
+        self,
+        name: str,
+        path: Path,
+        description: str = "",
+        format: Optional[str] = None,
+        indexes: Optional[Sequence[str]] = None,
+    ) -> DatasetReference:
         normalized_path = Path(path).expanduser().resolve()
         if not normalized_path.exists():
             raise FileNotFoundError(f"Dataset {name!r} not found at {normalized_path}")
+        format = (format or infer_format(normalized_path)).lower()
+        if format not in supported_formats():
+            raise ValueError(f"Unsupported dataset format {format!r}")
 
         reference = DatasetReference(
             name=name,
             path=str(normalized_path),
             format=format,
             description=description,
+            indexes=list(indexes or []),
         )
         self._datasets[name] = reference
         return reference
@@ -52,47 +79,124 @@ class DatasetRegistry:
     def list(self) -> Iterable[DatasetReference]:
         return self._datasets.values()
 
-    def preview_rows(self, name: str, limit: int = 5) -> Preview:
-        reference = self.get(name)
-        if reference.format.lower() != "csv":
-            raise ValueError("Only CSV previews are supported")
-
-        path = Path(reference.path)
-        with path.open() as handle:
-            reader = csv.reader(handle)
-            headers = next(reader, [])
-            rows = [row for _, row in zip(range(limit), reader)]
+    @traced("datasets.preview_rows")
+    def preview_rows(self, name: str, limit: int = 5, columns: Optional[Sequence[str]] = None) -> Preview:
+        reader = open_reader(self.get(name))
+        headers = list(columns) if columns is not None else reader.headers()
+        rows = [
+            ["" if value is None else str(value) for value in row]
+            for _, row in zip(range(limit), reader.iter_rows(columns))
+        ]
         return Preview(headers=headers, rows=rows)
 
-    def column_summary(self, name: str) -> Dict[str, Dict[str, float]]:
-        reference = self.get(name)
-        if reference.format.lower() != "csv":
-            raise ValueError("Only CSV summaries are supported")
-
-        path = Path(reference.path)
-        with path.open() as handle:
-            reader = csv.DictReader(handle)
-            columns: Dict[str, List[float]] = {header: [] for header in reader.fieldnames or []}
-            for row in reader:
-                for key, value in row.items():
-                    try:
-                        number = float(value)
-                        columns[key].append(number)
-                    except (TypeError, ValueError):
-                        continue
+    @traced("datasets.column_summary")
+    def column_summary(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        stats: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """Summarize numeric columns, reading only ``columns`` when given.
+
+        When only ``min``/``max``/``count`` are requested and the format keeps
+        per-row-group statistics, the answer comes from file metadata alone.
+        """
+
+        reader = open_reader(self.get(name))
+        selected = list(columns) if columns is not None else reader.headers()
+        wanted = set(stats or SUMMARY_STATS)
+        unknown = wanted - set(SUMMARY_STATS)
+        if unknown:
+            raise ValueError(f"Unknown summary statistics {sorted(unknown)}")
+
+        if wanted <= {"min", "max", "count"}:
+            bounds = reader.column_bounds(selected)
+            if bounds is not None:
+                telemetry.count("datasets.summaries_from_statistics")
+                return {
+                    column: {key: value for key, value in values.items() if key in wanted}
+                    for column, values in bounds.items()
+                }
+
+        values_by_column: Dict[str, List[float]] = {column: [] for column in selected}
+        rows_read = 0
+        for row in reader.iter_rows(selected, skip_empty=True):
+            rows_read += 1
+            for column, value in zip(selected, row):
+                try:
+                    number = float(value)
+                    values_by_column[column].append(number)
+                except (TypeError, ValueError):
+                    continue
+        telemetry.count("datasets.rows_read", rows_read)
 
         summary: Dict[str, Dict[str, float]] = {}
-        for column, values in columns.items():
+        for column, values in values_by_column.items():
             if not values:
                 continue
             summary[column] = {
-                "min": min(values),
-                "max": max(values),
-                "mean": statistics.mean(values),
-                "median": statistics.median(values),
-                "count": float(len(values)),
+                key: value
+                for key, value in (
+                    ("min", min(values)),
+                    ("max", max(values)),
+                    ("mean", statistics.mean(values) if "mean" in wanted else None),
+                    ("median", statistics.median(values) if "median" in wanted else None),
+                    ("count", float(len(values))),
+                )
+                if key in wanted
             }
         return summary
 
+    @traced("datasets.load")
+    def load(self, name: str) -> SharedDataset:
+        """Return read-only, column-oriented arrays for ``name``.
+
+        The dataset is parsed once per host into a memory-mapped cache; every
+        session and worker process loading it shares the same pages. Release
+        the handle (or use it as a context manager) when finished.
+        """
+
+        if self._shared is None:
+            self._shared = shared_store()
+        return self._shared.acquire(self.get(name))
+
+    @property
+    def engine(self) -> QueryEngine:
+        if self._engine is None:
+            path = self._database_path or Path(tempfile.gettempdir()) / "pairide-sql" / "datasets.sqlite"
+            self._engine = QueryEngine(path)
+        return self._engine
+
+    @traced("datasets.query")
+    def query(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        limit: int = 100,
+        offset: int = 0,
+        explain: bool = False,
+    ) -> QueryPage:
+        """Run ``sql`` against registered datasets, each exposed as a table of the same name."""
+
+        return self.engine.query(
+            sql,
+            params,
+            self._referenced(sql),
+            limit=limit,
+            offset=offset,
+            explain=explain,
+        )
+
+    def iter_query(self, sql: str, params: Sequence[Any] = (), page_size: int = 500) -> Iterator[tuple]:
+        return self.engine.iter_rows(sql, params, self._referenced(sql), page_size=page_size)
+
+    def _referenced(self, sql: str) -> List[DatasetReference]:
+        # SQL identifiers are case-insensitive, so "FROM Orders" reads "orders".
+        return [
+            reference
+            for name, reference in self._datasets.items()
+            if re.search(rf"(?<![\w]){re.escape(name)}(?![\w])", sql, re.IGNORECASE)
+        ]
+
     def to_state(self) -> Dict[str, DatasetReference]:
         return dict(self._datasets)
@@ -3,20 +3,123 @@
 from __future__ import annotations
 
 import io
+import pickle
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
 from contextlib import redirect_stdout
 from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
 from time import perf_counter
-from typing import Dict
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from .datasets import DatasetRegistry
 from .models import Cell, ExecutionResult
+from .shared import NumericColumn, SharedDataset, TextColumn
+from .telemetry import telemetry, traced
+
+_RESERVED_NAMES = {"__builtins__", "datasets"}
+_SIZE_SAMPLE = 64
+_SIZE_DEPTH = 3
+
+
+def approximate_size(value: object, *, sample: int = _SIZE_SAMPLE, depth: int = _SIZE_DEPTH) -> int:
+    """Estimate the deep size of ``value`` in bytes.
+
+    Objects exposing ``nbytes`` (NumPy arrays) or ``memory_usage`` (pandas) are
+    asked for their shallow size; pandas object columns are then estimated from
+    at most ``sample`` values. Containers are measured the same way, by sampling
+    and extrapolating, so the cost stays flat for large collections.
+    """
+
+    return _approximate_size(value, sample, depth, set())
+
+
+def _approximate_size(value: object, sample: int, depth: int, seen: Set[int]) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage) and not isinstance(value, type):
+        try:
+            usage = memory_usage(deep=False)
+            size = int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+            return size + _object_columns_size(value, sample, depth, seen)
+        except Exception:  # noqa: BLE001 fall back to the generic estimate
+            pass
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int) and not isinstance(value, type):
+        return nbytes + sys.getsizeof(value, 0)
+
+    size = sys.getsizeof(value, 0)
+    if depth <= 0 or isinstance(value, (str, bytes, bytearray, int, float, complex, bool)):
+        return size
+
+    if isinstance(value, dict):
+        items = list(islice(value.items(), sample))
+        if items:
+            sampled = sum(
+                _approximate_size(key, sample, depth - 1, seen)
+                + _approximate_size(item, sample, depth - 1, seen)
+                for key, item in items
+            )
+            size += sampled * len(value) // len(items)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(islice(value, sample))
+        if items:
+            sampled = sum(_approximate_size(item, sample, depth - 1, seen) for item in items)
+            size += sampled * len(value) // len(items)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += _approximate_size(vars(value), sample, depth - 1, seen)
+    return size
+
+
+def _object_columns_size(value: object, sample: int, depth: int, seen: Set[int]) -> int:
+    """Sampled size of the Python objects held by pandas ``object`` columns."""
+
+    dtypes = getattr(value, "dtypes", None)
+    if hasattr(value, "columns"):
+        columns = [value.iloc[:, position] for position, dtype in enumerate(dtypes) if dtype == object]
+    else:
+        columns = [value] if getattr(value, "dtype", None) == object else []
+    size = 0
+    for column in columns:
+        items = column.iloc[:sample].tolist()
+        if items:
+            sampled = sum(_approximate_size(item, sample, depth - 1, seen) for item in items)
+            size += sampled * len(column) // len(items)
+    return size
 
 
 class ExecutionEngine:
-    """Runs notebook cells in isolated namespaces per session."""
+    """Runs notebook cells in isolated namespaces per session.
 
-    def __init__(self) -> None:
-        self._namespaces: Dict[str, Dict[str, object]] = {}
+    Namespaces are kept in least-recently-used order. When ``memory_budget`` (in
+    bytes) is set and the accounted size of all resident namespaces exceeds it,
+    idle sessions are pickled to ``spill_dir`` and transparently reloaded the
+    next time one of their cells runs. Values that cannot be pickled (such as
+    functions defined in a cell) stay resident in a pinned remainder of the
+    namespace; :meth:`unspillable` reports them and they keep counting
+    towards :meth:`memory_usage`. Variable sizes are cached and re-measured
+    only when a name is bound to a different object.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        spill_dir: Optional[Union[str, Path]] = None,
+    ) -> None:
+        self._namespaces: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self._sizes: Dict[str, Dict[str, int]] = {}
+        self._measured: Dict[str, Dict[str, Tuple[object, int]]] = {}
+        self._spilled: Dict[str, Path] = {}
+        self._pinned: Dict[str, Dict[str, object]] = {}
+        self.memory_budget = memory_budget
+        self._spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._owns_spill_dir = False
 
     def _safe_builtins(self) -> Dict[str, object]:
         allowed = {
@@ -35,6 +138,7 @@ class ExecutionEngine:
         }
         return allowed
 
+    @traced("executor.run_cell")
     def run_cell(self, session_id: str, cell: Cell, datasets: DatasetRegistry) -> ExecutionResult:
         if cell.cell_type != "code":
             return ExecutionResult(
@@ -46,10 +150,7 @@ class ExecutionEngine:
                 variables=[],
             )
 
-        namespace = self._namespaces.setdefault(
-            session_id,
-            {"__builtins__": self._safe_builtins(), "datasets": datasets},
-        )
+        namespace = self._namespace(session_id, datasets)
 
         buffer = io.StringIO()
         start = perf_counter()
@@ -60,6 +161,9 @@ class ExecutionEngine:
         except Exception as exc:  # noqa: PERF203 raised for clarity
             error_message = f"{exc.__class__.__name__}: {exc}"
         duration = perf_counter() - start
+        telemetry.observe("executor.exec_seconds", duration)
+        if error_message is not None:
+            telemetry.count("executor.errors")
 
         variable_names = sorted(
             key
@@ -68,6 +172,9 @@ class ExecutionEngine:
             and key not in {"datasets"}
             and not callable(value)
         )
+        variable_sizes = self._measure(session_id, namespace, variable_names)
+        self._sizes[session_id] = variable_sizes
+        self._enforce_budget(keep=session_id)
 
         return ExecutionResult(
             success=error_message is None,
@@ -76,7 +183,146 @@ class ExecutionEngine:
             duration=duration,
             timestamp=datetime.now(timezone.utc).isoformat(),
             variables=variable_names,
+            variable_sizes=variable_sizes,
         )
 
+    def _measure(self, session_id: str, namespace: Dict[str, object], names: List[str]) -> Dict[str, int]:
+        previous = self._measured.get(session_id, {})
+        measured: Dict[str, Tuple[object, int]] = {}
+        for name in names:
+            value = namespace[name]
+            cached = previous.get(name)
+            if cached is not None and cached[0] is value:
+                measured[name] = cached
+            else:
+                measured[name] = (value, approximate_size(value))
+        self._measured[session_id] = measured
+        return {name: size for name, (_, size) in measured.items()}
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Return the accounted size in bytes of each session's resident values."""
+
+        sessions = [*self._pinned, *self._namespaces]
+        return {session_id: sum(self._sizes.get(session_id, {}).values()) for session_id in sessions}
+
+    def total_memory(self) -> int:
+        return sum(self.memory_usage().values())
+
+    def is_spilled(self, session_id: str) -> bool:
+        return session_id in self._spilled
+
+    def unspillable(self) -> Dict[str, List[str]]:
+        """Return, per spilled session, the unpicklable variables kept resident."""
+
+        return {
+            session_id: sorted(key for key in namespace if key not in _RESERVED_NAMES)
+            for session_id, namespace in self._pinned.items()
+        }
+
     def reset(self, session_id: str) -> None:
-        self._namespaces.pop(session_id, None)
+        for namespaces in (self._namespaces, self._pinned):
+            namespace = namespaces.pop(session_id, None)
+            if namespace is not None:
+                _release_handles(namespace)
+        self._sizes.pop(session_id, None)
+        self._measured.pop(session_id, None)
+        spill_path = self._spilled.pop(session_id, None)
+        if spill_path is not None:
+            spill_path.unlink(missing_ok=True)
+        if self._owns_spill_dir and not self._spilled:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir, self._owns_spill_dir = None, False
+
+    def close(self) -> None:
+        """Drop every session, removing spill files and any temporary spill directory."""
+
+        for session_id in [*self._namespaces, *self._pinned, *self._spilled]:
+            self.reset(session_id)
+
+    def _namespace(self, session_id: str, datasets: DatasetRegistry) -> Dict[str, object]:
+        namespace = self._namespaces.get(session_id)
+        if namespace is not None:
+            self._namespaces.move_to_end(session_id)
+            return namespace
+
+        # Reuse the pinned remainder so functions defined in the session keep
+        # the same globals dict once the spilled variables are restored.
+        namespace = self._pinned.pop(session_id, None)
+        if namespace is None:
+            namespace = {"__builtins__": self._safe_builtins(), "datasets": datasets}
+        spill_path = self._spilled.pop(session_id, None)
+        if spill_path is not None:
+            with telemetry.span("executor.reload"), spill_path.open("rb") as handle:
+                namespace.update(pickle.load(handle))
+            spill_path.unlink(missing_ok=True)
+        self._namespaces[session_id] = namespace
+        return namespace
+
+    def _enforce_budget(self, keep: str) -> None:
+        if self.memory_budget is None:
+            return
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        for session_id in list(self._namespaces):
+            if total <= self.memory_budget:
+                break
+            if session_id == keep:
+                continue
+            if self._spill(session_id):
+                total -= usage[session_id] - sum(self._sizes.get(session_id, {}).values())
+
+    @traced("executor.spill")
+    def _spill(self, session_id: str) -> bool:
+        namespace = self._namespaces[session_id]
+        variables = {key: value for key, value in namespace.items() if key not in _RESERVED_NAMES}
+        try:
+            payload = pickle.dumps(variables, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # noqa: BLE001 find the values that must stay resident
+            for key in [key for key, value in variables.items() if not _picklable(value)]:
+                del variables[key]
+            try:
+                payload = pickle.dumps(variables, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:  # noqa: BLE001 fails only as a combination; keep the session
+                telemetry.count("executor.spill_failures")
+                return False
+
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="pairide-spill-"))
+            self._owns_spill_dir = True
+        self._spill_dir.mkdir(parents=True, exist_ok=True)
+        spill_path = self._spill_dir / f"{session_id}.pickle"
+        spill_path.write_bytes(payload)
+        telemetry.observe("executor.spill_bytes", len(payload))
+
+        self._spilled[session_id] = spill_path
+        _release_handles(variables)
+        for key in variables:
+            del namespace[key]
+        del self._namespaces[session_id]
+        sizes = self._sizes.pop(session_id, {})
+        measured = self._measured.pop(session_id, {})
+        pinned = [key for key in namespace if key not in _RESERVED_NAMES]
+        if pinned:
+            self._pinned[session_id] = namespace
+            self._sizes[session_id] = {key: sizes[key] for key in pinned if key in sizes}
+            self._measured[session_id] = {key: measured[key] for key in pinned if key in measured}
+            telemetry.count("executor.pinned_variables", len(pinned))
+        return True
+
+
+def _picklable(value: object) -> bool:
+    try:
+        pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:  # noqa: BLE001 any failure means the value stays resident
+        return False
+    return True
+
+
+def _release_handles(namespace: Dict[str, object]) -> None:
+    # Handles that are unbound or nested in containers are released by their
+    # finalizers once garbage collected.
+    for value in namespace.values():
+        if isinstance(value, (NumericColumn, TextColumn)):
+            value = value.dataset
+        if isinstance(value, SharedDataset):
+            value.release()
@@ -0,0 +1,250 @@
+"""Format-aware dataset readers with column projection."""
+
+from __future__ import annotations
+
+import bz2
+import csv
+import gzip
+import importlib
+import lzma
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .models import DatasetReference
+
+_BATCH_ROWS = 65536
+_NUMERIC_PHYSICAL_TYPES = {"INT32", "INT64", "FLOAT", "DOUBLE"}
+# Dates, times and timestamps are stored as integers too, but their statistics
+# come back as date/datetime objects.
+_NUMERIC_LOGICAL_TYPES = {"NONE", "INT", "DECIMAL"}
+
+_COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+_OPENERS: Dict[Optional[str], Callable[..., IO[str]]] = {
+    None: open,
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+
+
+def _import_optional(module: str, feature: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(f"{feature} support requires the optional 'pyarrow' package") from exc
+
+
+class DatasetReader:
+    """Streams rows from one dataset file.
+
+    ``iter_rows`` yields lists aligned with ``columns`` (all headers when
+    omitted), so formats that store columns separately only decode what is
+    asked for. With ``skip_empty``, readers may drop blocks of rows in which
+    every selected column is null; aggregations that ignore nulls can use it,
+    positional consumers such as previews must not.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def headers(self) -> List[str]:
+        raise NotImplementedError
+
+    def iter_rows(
+        self, columns: Optional[Sequence[str]] = None, *, skip_empty: bool = False
+    ) -> Iterator[List[Any]]:
+        raise NotImplementedError
+
+    def column_bounds(self, columns: Sequence[str]) -> Optional[Dict[str, Dict[str, float]]]:
+        """Return ``min``/``max``/``count`` per numeric column from file metadata, if available."""
+
+        return None
+
+    def _resolve(self, columns: Optional[Sequence[str]], headers: Optional[List[str]] = None) -> List[str]:
+        headers = self.headers() if headers is None else headers
+        if columns is None:
+            return headers
+        missing = [column for column in columns if column not in headers]
+        if missing:
+            raise KeyError(f"Unknown columns {missing} in {self.path}")
+        return list(columns)
+
+
+class CsvReader(DatasetReader):
+    """Reads plain or gzip/bz2/xz-compressed CSV, decoding as a stream."""
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        super().__init__(path)
+        self.compression = compression or _COMPRESSION_SUFFIXES.get(self.path.suffix.lower())
+
+    def _open(self) -> IO[str]:
+        return _OPENERS[self.compression](self.path, "rt", newline="")
+
+    def headers(self) -> List[str]:
+        with self._open() as handle:
+            return next(csv.reader(handle), [])
+
+    def iter_rows(
+        self, columns: Optional[Sequence[str]] = None, *, skip_empty: bool = False
+    ) -> Iterator[List[Any]]:
+        with self._open() as handle:
+            reader = csv.reader(handle)
+            headers = next(reader, [])
+            if columns is None:
+                width = len(headers)
+                for row in reader:
+                    yield row[:width] + [""] * (width - len(row))
+                return
+            positions = [headers.index(column) for column in self._resolve(columns, headers)]
+            for row in reader:
+                yield [row[position] if position < len(row) else "" for position in positions]
+
+
+class ParquetReader(DatasetReader):
+    """Reads Parquet files, decoding only projected columns.
+
+    With ``skip_empty``, row groups whose statistics show every selected value
+    is null are skipped without decoding.
+    """
+
+    def _file(self) -> Any:
+        parquet = _import_optional("pyarrow.parquet", "Parquet")
+        return parquet.ParquetFile(self.path)
+
+    def headers(self) -> List[str]:
+        return list(self._file().schema_arrow.names)
+
+    def iter_rows(
+        self, columns: Optional[Sequence[str]] = None, *, skip_empty: bool = False
+    ) -> Iterator[List[Any]]:
+        parquet_file = self._file()
+        selected = self._resolve(columns)
+        row_groups = None
+        if skip_empty:
+            row_groups = self._row_groups_with_values(parquet_file, selected)
+            if not row_groups:
+                return
+        for batch in parquet_file.iter_batches(
+            batch_size=_BATCH_ROWS, row_groups=row_groups, columns=selected
+        ):
+            yield from (list(row) for row in zip(*(column.to_pylist() for column in batch.columns)))
+
+    def column_bounds(self, columns: Sequence[str]) -> Optional[Dict[str, Dict[str, float]]]:
+        parquet_file = self._file()
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema
+        positions = {schema.column(index).path: index for index in range(metadata.num_columns)}
+        bounds: Dict[str, Dict[str, float]] = {}
+        for column in columns:
+            position = positions.get(column)
+            if position is None or not _is_numeric(schema.column(position)):
+                return None
+            low = high = None
+            count = 0
+            for group in range(metadata.num_row_groups):
+                statistics = metadata.row_group(group).column(position).statistics
+                if statistics is None or not statistics.has_min_max:
+                    if statistics is not None and statistics.null_count == metadata.row_group(group).num_rows:
+                        continue
+                    return None
+                low = statistics.min if low is None else min(low, statistics.min)
+                high = statistics.max if high is None else max(high, statistics.max)
+                count += statistics.num_values
+            if count:
+                bounds[column] = {"min": float(low), "max": float(high), "count": float(count)}
+        return bounds
+
+    def _row_groups_with_values(self, parquet_file: Any, columns: Sequence[str]) -> List[int]:
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema
+        positions = [
+            index for index in range(metadata.num_columns) if schema.column(index).path in columns
+        ]
+        groups = []
+        for group in range(metadata.num_row_groups):
+            row_group = metadata.row_group(group)
+            for position in positions:
+                statistics = row_group.column(position).statistics
+                if statistics is None or statistics.null_count < row_group.num_rows:
+                    groups.append(group)
+                    break
+        return groups
+
+
+def _is_numeric(column: Any) -> bool:
+    return (
+        column.physical_type in _NUMERIC_PHYSICAL_TYPES
+        and column.logical_type.type in _NUMERIC_LOGICAL_TYPES
+    )
+
+
+class ArrowReader(DatasetReader):
+    """Reads Arrow IPC / Feather v2 files through a memory map.
+
+    Only the buffers of projected columns are touched, so unselected columns
+    are never paged in.
+    """
+
+    def headers(self) -> List[str]:
+        with self._open() as reader:
+            return list(reader.schema.names)
+
+    def _open(self) -> Any:
+        pyarrow = _import_optional("pyarrow", "Arrow")
+        ipc = _import_optional("pyarrow.ipc", "Arrow")
+        return ipc.open_file(pyarrow.memory_map(str(self.path), "r"))
+
+    def iter_rows(
+        self, columns: Optional[Sequence[str]] = None, *, skip_empty: bool = False
+    ) -> Iterator[List[Any]]:
+        selected = self._resolve(columns)
+        with self._open() as reader:
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index).select(selected)
+                yield from (list(row) for row in zip(*(column.to_pylist() for column in batch.columns)))
+
+
+_READERS: Dict[str, Callable[[Path], DatasetReader]] = {
+    "csv": CsvReader,
+    "csv.gz": lambda path: CsvReader(path, "gzip"),
+    "csv.bz2": lambda path: CsvReader(path, "bz2"),
+    "csv.xz": lambda path: CsvReader(path, "xz"),
+    "parquet": ParquetReader,
+    "arrow": ArrowReader,
+    "feather": ArrowReader,
+}
+
+_SUFFIX_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "feather",
+}
+
+
+def register_reader(format: str, factory: Callable[[Path], DatasetReader]) -> None:
+    """Make ``format`` available to ``DatasetRegistry.register``."""
+
+    _READERS[format.lower()] = factory
+
+
+def supported_formats() -> List[str]:
+    return sorted(_READERS)
+
+
+def infer_format(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if len(suffixes) >= 2 and suffixes[-1] in _COMPRESSION_SUFFIXES and suffixes[-2] == ".csv":
+        return "csv" + suffixes[-1]
+    if suffixes and suffixes[-1] in _SUFFIX_FORMATS:
+        return _SUFFIX_FORMATS[suffixes[-1]]
+    return "csv"
+
+
+def open_reader(reference: DatasetReference) -> DatasetReader:
+    try:
+        factory = _READERS[reference.format.lower()]
+    except KeyError as exc:
+        raise ValueError(f"Unsupported dataset format {reference.format!r}") from exc
+    return factory(Path(reference.path))
@@ -0,0 +1,585 @@
+"""Parallel grading of candidate submissions against question test cases."""
+
+from __future__ import annotations
+
+import builtins
+import dataclasses
+import gc
+import io
+import json
+import math
+import os
+import pickle
+import random
+import resource
+import signal
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from multiprocessing import Pipe, get_context
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from time import perf_counter
+from types import CodeType
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .telemetry import telemetry, traced
+
+_OUTPUT_LIMIT = 4096
+_SETUP_TIMEOUT = 60.0
+
+
+@dataclass
+class Submission:
+    """Candidate source code defining the functions under test."""
+
+    id: str
+    source: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Submission":
+        return cls(**data)
+
+
+@dataclass
+class TestCase:
+    """Calls ``function(*args, **kwargs)`` and compares the result with ``expected``."""
+
+    __test__ = False  # not a pytest test class
+
+    id: str
+    function: str
+    args: List[Any] = field(default_factory=list)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    expected: Any = None
+    tolerance: Optional[float] = None
+    timeout: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TestCase":
+        return cls(**data)
+
+
+@dataclass
+class CaseResult:
+    """Outcome of one submission on one test case."""
+
+    submission_id: str
+    case_id: str
+    status: str
+    duration: float
+    output: str = ""
+    detail: Optional[str] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CaseResult":
+        return cls(**data)
+
+
+@dataclass
+class GradeReport:
+    """All case results, ordered by submission and then by test case."""
+
+    results: List[CaseResult] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        totals: Dict[str, Dict[str, Any]] = {}
+        for result in self.results:
+            entry = totals.setdefault(result.submission_id, {"passed": 0, "total": 0, "statuses": {}})
+            entry["total"] += 1
+            entry["passed"] += int(result.passed)
+            entry["statuses"][result.status] = entry["statuses"].get(result.status, 0) + 1
+        for entry in totals.values():
+            entry["score"] = entry["passed"] / entry["total"] if entry["total"] else 0.0
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": self.wall_time,
+            "summary": self.summary(),
+            "results": [result.to_dict() for result in self.results],
+        }
+
+
+def load_submissions(path: Union[str, Path]) -> List[Submission]:
+    """Read submissions from a directory of ``.py`` files or a JSON list."""
+
+    path = Path(path)
+    if path.is_dir():
+        return [Submission(id=file.stem, source=file.read_text()) for file in sorted(path.glob("*.py"))]
+    return [Submission.from_dict(item) for item in json.loads(path.read_text())]
+
+
+def load_cases(path: Union[str, Path]) -> List[TestCase]:
+    return [TestCase.from_dict(item) for item in json.loads(Path(path).read_text())]
+
+
+def _matches(actual: Any, expected: Any, tolerance: Optional[float]) -> bool:
+    if tolerance is not None:
+        if isinstance(actual, (int, float)) and isinstance(expected, (int, float)):
+            return math.isclose(actual, expected, rel_tol=0.0, abs_tol=tolerance)
+        if isinstance(actual, (list, tuple)) and isinstance(expected, (list, tuple)):
+            return len(actual) == len(expected) and all(
+                _matches(left, right, tolerance) for left, right in zip(actual, expected)
+            )
+        if isinstance(actual, dict) and isinstance(expected, dict):
+            return actual.keys() == expected.keys() and all(
+                _matches(actual[key], expected[key], tolerance) for key in actual
+            )
+    if isinstance(actual, tuple) and isinstance(expected, list):
+        # Expected values usually come from JSON, which has no tuples.
+        actual = list(actual)
+    return actual == expected
+
+
+class _Fixtures:
+    """The warmed setup namespace, handed out as a fresh copy for every case.
+
+    Picklable values are restored from one snapshot taken after setup, so a
+    candidate mutating ``DATA`` cannot affect any other case or submission.
+    Values that cannot be pickled (modules, functions defined by the setup
+    code) are shared as-is.
+    """
+
+    def __init__(self, setup_source: str, fixtures: Dict[str, Any]):
+        base: Dict[str, Any] = {"__builtins__": builtins, "__name__": "__submission__", **fixtures}
+        if setup_source:
+            exec(compile(setup_source, "<grading setup>", "exec"), base)
+        self._shared: Dict[str, Any] = {}
+        copied: Dict[str, Any] = {}
+        for key, value in base.items():
+            try:
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:  # noqa: BLE001 shared instead of copied
+                self._shared[key] = value
+            else:
+                copied[key] = value
+        self._snapshot = pickle.dumps(copied, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def namespace(self) -> Dict[str, Any]:
+        return {**self._shared, **pickle.loads(self._snapshot)}
+
+
+class _ResultUnpickler(pickle.Unpickler):
+    """Loads worker messages without resolving any global except ``complex``.
+
+    Messages carry values produced by candidate code, so loading them must not
+    be able to call anything in the grader process.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) == ("builtins", "complex"):
+            return complex
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a grading result")
+
+
+def _send(connection: Connection, message: Any) -> None:
+    connection.send_bytes(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _receive(connection: Connection) -> Any:
+    return _ResultUnpickler(io.BytesIO(connection.recv_bytes())).load()
+
+
+def _plain(value: Any) -> Any:
+    """Copy a returned value into built-in types, dropping any custom behaviour."""
+
+    if value is None:
+        return None
+    for kind in (bool, int, float, complex, str, bytes):
+        if isinstance(value, kind):
+            return kind(value)
+    if isinstance(value, dict):
+        return {_plain(key): _plain(item) for key, item in value.items()}
+    for kind in (list, tuple, set, frozenset):
+        if isinstance(value, kind):
+            return kind(_plain(item) for item in value)
+    tolist = getattr(value, "tolist", None)  # NumPy arrays and scalars
+    if callable(tolist):
+        return _plain(tolist())
+    raise TypeError(f"returned a {type(value).__name__}, which cannot be compared")
+
+
+class _Child:
+    """A process forked from the warm worker to run the cases of one submission.
+
+    It talks to the worker over a pipe of its own and never holds the
+    grader's connection.
+    """
+
+    def __init__(self, fixtures: _Fixtures, submission_id: str, source: str, upstream: Connection):
+        self.connection, child_end = Pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            upstream.close()
+            self.connection.close()
+            status = 0
+            try:
+                _serve_submission(child_end, fixtures, submission_id, source)
+            except BaseException:  # noqa: BLE001 reported by the worker as a crash
+                status = 1
+            finally:
+                os._exit(status)
+        child_end.close()
+
+    def close(self) -> int:
+        self.connection.close()
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _, status = os.waitpid(self.pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+
+def _worker_main(
+    connection: Connection,
+    setup_source: str,
+    fixtures: Dict[str, Any],
+    memory_limit: Optional[int],
+) -> None:
+    """Worker loop: warm the fixtures once, then fork a fresh process per submission.
+
+    Whatever a submission changes in its process (builtins, imported modules,
+    this module) is discarded with it, so it cannot affect later submissions.
+    The worker only relays cases to the child and results back to the grader.
+    """
+
+    # Own process group, so the grader can kill a worker together with its child.
+    os.setpgrp()
+    signal.signal(signal.SIGTERM, lambda *_: os.killpg(0, signal.SIGKILL))
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    warmed = _Fixtures(setup_source, fixtures)
+    # Keep the collector from touching (and so copying) the warm heap in each child.
+    gc.freeze()
+    _send(connection, ("ready",))
+
+    submission: Tuple[str, str] = ("", "")
+    child: Optional[_Child] = None
+    running = False
+    while True:
+        ready = wait([connection] if child is None else [child.connection, connection])
+        if child is not None and child.connection in ready:
+            try:
+                connection.send_bytes(child.connection.recv_bytes())
+            except EOFError:
+                code = child.close()
+                child = None
+                if running:
+                    detail = f"Submission process exited with status {code}"
+                    _send(connection, {"status": "error", "duration": 0.0, "output": "", "detail": detail})
+            running = False
+            continue
+
+        message = connection.recv()
+        if message[0] == "stop":
+            break
+        if message[0] == "submission":
+            if child is not None:
+                child.close()
+                child = None
+            submission = message[1], message[2]
+            continue
+        if child is None:
+            child = _Child(warmed, *submission, connection)
+        child.connection.send(message[1])
+        running = True
+    if child is not None:
+        child.close()
+
+
+def _serve_submission(connection: Connection, fixtures: _Fixtures, submission_id: str, source: str) -> None:
+    code: Optional[CodeType] = None
+    compile_error: Optional[str] = None
+    try:
+        code = compile(source, f"<submission {submission_id}>", "exec")
+    except Exception as exc:  # noqa: BLE001 reported for every case
+        compile_error = f"{exc.__class__.__name__}: {exc}"
+    while True:
+        try:
+            case_data = connection.recv()
+        except EOFError:
+            return
+        _send(connection, _run_case(fixtures, code, compile_error, submission_id, case_data))
+
+
+def _run_case(
+    fixtures: _Fixtures,
+    code: Optional[CodeType],
+    compile_error: Optional[str],
+    submission_id: str,
+    case_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Execute the submission into a fresh namespace and call one case's function.
+
+    Module-level state never carries over between cases. The returned value
+    is sent back as plain data and judged by the grader, outside the reach of
+    candidate code.
+    """
+
+    case = TestCase.from_dict(case_data)
+    random.seed(f"{submission_id}:{case.id}")
+    load_error = compile_error
+    namespace: Dict[str, Any] = {}
+    if code is not None:
+        namespace = fixtures.namespace()
+        try:
+            with redirect_stdout(io.StringIO()):
+                exec(code, namespace)
+        except BaseException as exc:  # noqa: BLE001 reported as the case outcome
+            load_error = f"{exc.__class__.__name__}: {exc}"
+    if load_error is not None:
+        return {"status": "error", "duration": 0.0, "output": "", "detail": f"Submission failed to load: {load_error}"}
+    function = namespace.get(case.function)
+    if not callable(function):
+        return {"status": "error", "duration": 0.0, "output": "", "detail": f"{case.function!r} is not defined"}
+
+    buffer = io.StringIO()
+    start = perf_counter()
+    try:
+        with redirect_stdout(buffer):
+            actual = _plain(function(*case.args, **case.kwargs))
+    except BaseException as exc:  # noqa: BLE001 candidate code may raise anything
+        result: Dict[str, Any] = {"status": "error", "detail": f"{exc.__class__.__name__}: {exc}"}
+    else:
+        result = {"status": "returned", "actual": actual}
+    result["duration"] = perf_counter() - start
+    result["output"] = buffer.getvalue()[:_OUTPUT_LIMIT]
+    return result
+
+
+def _judge(case: TestCase, payload: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    if payload.get("status") != "returned":
+        return "error", payload.get("detail")
+    actual = payload.get("actual")
+    if _matches(actual, case.expected, case.tolerance):
+        return "passed", None
+    return "failed", f"expected {case.expected!r}, got {actual!r}"[:_OUTPUT_LIMIT]
+
+
+@contextmanager
+def _fixed_hash_seed() -> Iterator[None]:
+    # Spawned interpreters read PYTHONHASHSEED at startup; pinning it keeps set
+    # and dict-of-str iteration order identical from run to run.
+    previous = os.environ.get("PYTHONHASHSEED")
+    os.environ["PYTHONHASHSEED"] = "0"
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["PYTHONHASHSEED"]
+        else:
+            os.environ["PYTHONHASHSEED"] = previous
+
+
+class _Worker:
+    def __init__(self, grader: "Grader"):
+        context = get_context("spawn")
+        self.connection, child = context.Pipe()
+        with _fixed_hash_seed():
+            self.process = context.Process(
+                target=_worker_main,
+                args=(child, grader.setup_source, grader.fixtures, grader.memory_limit),
+                daemon=True,
+            )
+            self.process.start()
+        child.close()
+        self.last_submission: Optional[int] = None
+        self.task: Optional[Tuple[int, int, float]] = None
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self.connection.poll(timeout):
+            self.kill()
+            raise TimeoutError("Grading worker did not finish setup in time")
+        try:
+            _receive(self.connection)
+        except EOFError as exc:
+            self.kill()
+            raise RuntimeError("Grading worker failed during setup") from exc
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass  # not yet in its own group
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(("stop",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1.0)
+        self.kill()
+
+
+class Grader:
+    """Fans submissions x test cases out over a pool of warm worker processes.
+
+    Every worker runs ``setup_source`` and receives ``fixtures`` once at
+    startup, then forks a fresh process for each submission it is handed, so
+    no submission can change the interpreter another one runs in. Each case
+    executes the submission into a fresh copy of the fixtures, so cases
+    cannot observe one another either. Cases of the same submission are
+    routed back to the worker that already forked for it. Only the returned
+    value comes back, and it is compared with the expected one here; the
+    expected value is never sent to the worker. A case exceeding its timeout
+    kills its worker, which is replaced before the next case runs. Candidate
+    code has full builtins; isolation comes from the process boundary and the
+    optional ``memory_limit`` (bytes of address space).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout: float = 5.0,
+        setup_source: str = "",
+        fixtures: Optional[Dict[str, Any]] = None,
+        memory_limit: Optional[int] = None,
+    ):
+        self.size = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.setup_source = setup_source
+        self.fixtures = dict(fixtures or {})
+        self.memory_limit = memory_limit
+        self._workers: List[_Worker] = []
+
+    def __enter__(self) -> "Grader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+        self._workers.clear()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self)
+        worker.wait_ready(_SETUP_TIMEOUT)
+        return worker
+
+    def _ensure_workers(self, count: int) -> None:
+        self._workers = [worker for worker in self._workers if worker.process.is_alive()]
+        starting = [_Worker(self) for _ in range(count - len(self._workers))]
+        for worker in starting:
+            worker.wait_ready(_SETUP_TIMEOUT)
+        self._workers.extend(starting)
+
+    @traced("grading.grade")
+    def grade(self, submissions: Sequence[Submission], cases: Sequence[TestCase]) -> GradeReport:
+        started = perf_counter()
+        pending: "OrderedDict[int, Deque[int]]" = OrderedDict(
+            (index, deque(range(len(cases)))) for index in range(len(submissions)) if cases
+        )
+        active: Dict[int, int] = {}
+        outcomes: Dict[Tuple[int, int], CaseResult] = {}
+        total = len(submissions) * len(cases)
+        if total:
+            self._ensure_workers(min(self.size, total))
+        # Every case is enqueued at once, as soon as the pool is ready.
+        queued_at = perf_counter()
+
+        def next_task(worker: _Worker) -> Optional[Tuple[int, int]]:
+            choice = worker.last_submission if worker.last_submission in pending else None
+            if choice is None:
+                choice = next((index for index in pending if not active.get(index)), None)
+            if choice is None:
+                choice = next(iter(pending), None)
+            if choice is None:
+                return None
+            case_index = pending[choice].popleft()
+            if not pending[choice]:
+                del pending[choice]
+            return choice, case_index
+
+        def dispatch(worker: _Worker) -> None:
+            task = next_task(worker)
+            if task is None:
+                return
+            submission_index, case_index = task
+            case = cases[case_index]
+            deadline = time.monotonic() + (case.timeout if case.timeout is not None else self.timeout)
+            telemetry.observe("grading.queue_wait_seconds", perf_counter() - queued_at)
+            worker.task = (submission_index, case_index, deadline)
+            if worker.last_submission != submission_index:
+                submission = submissions[submission_index]
+                worker.connection.send(("submission", submission.id, submission.source))
+                worker.last_submission = submission_index
+            active[submission_index] = active.get(submission_index, 0) + 1
+            call = {"id": case.id, "function": case.function, "args": case.args, "kwargs": case.kwargs}
+            worker.connection.send(("run", call))
+
+        def finish(worker: _Worker, status: str, payload: Dict[str, Any]) -> None:
+            assert worker.task is not None
+            submission_index, case_index, _ = worker.task
+            worker.task = None
+            active[submission_index] -= 1
+            outcomes[(submission_index, case_index)] = CaseResult(
+                submission_id=submissions[submission_index].id,
+                case_id=cases[case_index].id,
+                status=status,
+                duration=payload.get("duration", 0.0),
+                output=payload.get("output", ""),
+                detail=payload.get("detail"),
+            )
+            telemetry.count(f"grading.{status}")
+            telemetry.observe("grading.case_seconds", outcomes[(submission_index, case_index)].duration)
+
+        def replace(worker: _Worker) -> _Worker:
+            worker.kill()
+            fresh = self._spawn()
+            self._workers[self._workers.index(worker)] = fresh
+            return fresh
+
+        for worker in self._workers:
+            dispatch(worker)
+
+        while len(outcomes) < total:
+            busy = [worker for worker in self._workers if worker.task is not None]
+            nearest = min(worker.task[2] for worker in busy)  # type: ignore[index]
+            ready = wait([worker.connection for worker in busy], timeout=max(0.0, nearest - time.monotonic()))
+            now = time.monotonic()
+            for worker in busy:
+                if worker.connection in ready:
+                    try:
+                        payload = _receive(worker.connection)
+                    except (EOFError, OSError, pickle.UnpicklingError):
+                        finish(worker, "error", {"detail": "Worker process crashed"})
+                        worker = replace(worker)
+                    else:
+                        if not isinstance(payload, dict):
+                            payload = {"status": "error", "detail": "Malformed result from the worker"}
+                        status, detail = _judge(cases[worker.task[1]], payload)  # type: ignore[index]
+                        finish(worker, status, {**payload, "detail": detail})
+                elif worker.task is not None and now >= worker.task[2]:
+                    case = cases[worker.task[1]]
+                    limit = case.timeout if case.timeout is not None else self.timeout
+                    finish(worker, "timeout", {"duration": limit, "detail": f"Exceeded {limit:g}s"})
+                    worker = replace(worker)
+                else:
+                    continue
+                dispatch(worker)
+
+        ordered = [outcomes[key] for key in sorted(outcomes)]
+        return GradeReport(results=ordered, wall_time=perf_counter() - started)
@@ -49,6 +49,7 @@ class ExecutionResult:
     duration: float
     timestamp: str
     variables: List[str] = field(default_factory=list)
+    variable_sizes: Dict[str, int] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
         return dataclasses.asdict(self)
@@ -122,6 +123,7 @@ class DatasetReference:
     path: str
     format: str = "csv"
     description: str = ""
+    indexes: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
         return dataclasses.asdict(self)
@@ -0,0 +1,476 @@
+"""Vectorized power and sample-size planning for two-arm conversion experiments.
+
+Every grid function takes scalars or sequences for each planning axis and
+evaluates the full factorial grid in a handful of NumPy array operations, so
+millions of scenarios take seconds. Sequential designs use Lan-DeMets alpha
+spending with equally spaced looks; their boundaries are solved once per
+unique ``(alpha, looks)`` pair and their sample-size inflation once per
+``(alpha, power, looks)`` combination, then broadcast across the grid.
+
+NumPy and SciPy are optional dependencies, imported on first use.
+"""
+
+from __future__ import annotations
+
+import importlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .telemetry import traced
+
+Axis = Union[float, int, Sequence[float]]
+
+SPENDING_FUNCTIONS = ("obrien-fleming", "pocock")
+_CHUNK_SIMULATIONS = 5000
+_SOLVE_CHUNK = 1 << 16
+
+
+def _import_optional(module: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError("Experiment planning requires the optional 'numpy' and 'scipy' packages") from exc
+
+
+@dataclass
+class PlanGrid:
+    """Results over a full factorial grid.
+
+    ``axes`` holds the input values in grid order; every array in ``values``
+    broadcasts to :attr:`shape`, with one dimension per axis.
+    """
+
+    axes: Dict[str, Any]
+    values: Dict[str, Any] = field(default_factory=dict)
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(values) for values in self.axes.values())
+
+    @property
+    def size(self) -> int:
+        return math.prod(self.shape)
+
+    def __getitem__(self, name: str) -> Any:
+        np = _import_optional("numpy")
+        if name in self.axes:
+            return np.broadcast_to(_axis_view(np, self.axes, name), self.shape)
+        return np.broadcast_to(self.values[name], self.shape)
+
+    def scenario(self, index: int) -> Dict[str, Any]:
+        """The inputs and results of one scenario, by flat index."""
+
+        np = _import_optional("numpy")
+        position = np.unravel_index(index, self.shape)
+        record: Dict[str, Any] = {name: values[i].item() for (name, values), i in zip(self.axes.items(), position)}
+        for name in self.values:
+            record[name] = self[name][position].item()
+        return record
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        count = self.size if limit is None else min(limit, self.size)
+        return [self.scenario(index) for index in range(count)]
+
+
+def _axis_view(np: Any, axes: Dict[str, Any], name: str) -> Any:
+    names = list(axes)
+    shape = [1] * len(names)
+    shape[names.index(name)] = -1
+    return axes[name].reshape(shape)
+
+
+def _build_axes(np: Any, **axes: Axis) -> Dict[str, Any]:
+    return {name: np.atleast_1d(np.asarray(values, dtype=float)) for name, values in axes.items()}
+
+
+def _validate(np: Any, axes: Dict[str, Any], spending: Optional[str]) -> None:
+    for name in ("baseline", "allocation", "alpha", "power"):
+        values = axes.get(name)
+        if values is not None and not np.all((values > 0) & (values < 1)):
+            raise ValueError(f"{name} values must lie strictly between 0 and 1")
+    looks = axes["looks"]
+    if not np.all((looks >= 1) & (looks == np.round(looks))):
+        raise ValueError("looks must be positive integers")
+    if spending is not None and spending not in SPENDING_FUNCTIONS:
+        raise ValueError(f"Unknown spending function {spending!r}; choose from {', '.join(SPENDING_FUNCTIONS)}")
+    if spending is None and np.any(looks > 1):
+        raise ValueError("Interim looks require a spending function")
+
+
+def _spent(spending: str, alpha: float, fraction: float) -> float:
+    """Cumulative one-sided alpha spent by information ``fraction`` (Lan-DeMets)."""
+
+    norm = _import_optional("scipy.stats").norm
+    if spending == "obrien-fleming":
+        return float(2 * norm.sf(norm.isf(alpha / 2) / math.sqrt(fraction)))
+    return alpha * math.log(1 + (math.e - 1) * fraction)
+
+
+def _look_covariance(looks: int) -> Any:
+    np = _import_optional("numpy")
+    fractions = np.arange(1, looks + 1) / looks
+    return np.sqrt(np.minimum.outer(fractions, fractions) / np.maximum.outer(fractions, fractions))
+
+
+def _stay_probability(bounds: Any, covariance: Any) -> float:
+    """P(Z_1 < b_1, ..., Z_k < b_k) for the canonical group-sequential process."""
+
+    stats = _import_optional("scipy.stats")
+    if len(bounds) == 1:
+        return float(stats.norm.cdf(bounds[0]))
+    distribution = stats.multivariate_normal(mean=None, cov=covariance, seed=0)
+    return float(distribution.cdf(bounds))
+
+
+@lru_cache(maxsize=None)
+def spending_boundaries(
+    alpha: float, looks: int, spending: Optional[str] = "obrien-fleming", two_sided: bool = True
+) -> Tuple[float, ...]:
+    """Z-score efficacy boundaries for ``looks`` equally spaced analyses.
+
+    Two-sided designs spend ``alpha / 2`` on each side with symmetric bounds.
+    """
+
+    stats = _import_optional("scipy.stats")
+    optimize = _import_optional("scipy.optimize")
+    one_sided = alpha / 2 if two_sided else alpha
+    if spending is None or looks == 1:
+        return (float(stats.norm.isf(one_sided)),)
+    covariance = _look_covariance(looks)
+    bounds: List[float] = []
+    for look in range(1, looks + 1):
+        target = 1 - _spent(spending, one_sided, look / looks)
+        sub = covariance[:look, :look]
+
+        def gap(bound: float) -> float:
+            return _stay_probability(bounds + [bound], sub) - target
+
+        bounds.append(float(optimize.brentq(gap, 0.0, 12.0, xtol=1e-6)))
+    return tuple(bounds)
+
+
+@lru_cache(maxsize=None)
+def inflation_factor(
+    alpha: float, power: float, looks: int, spending: Optional[str] = "obrien-fleming", two_sided: bool = True
+) -> float:
+    """Ratio of the sequential design's maximum sample size to the fixed design's."""
+
+    if spending is None or looks == 1:
+        return 1.0
+    np = _import_optional("numpy")
+    stats = _import_optional("scipy.stats")
+    optimize = _import_optional("scipy.optimize")
+    bounds = np.asarray(spending_boundaries(alpha, looks, spending, two_sided))
+    covariance = _look_covariance(looks)
+    root_fractions = np.sqrt(np.arange(1, looks + 1) / looks)
+
+    def gap(drift: float) -> float:
+        return 1 - _stay_probability(bounds - drift * root_fractions, covariance) - power
+
+    drift = optimize.brentq(gap, 0.0, 20.0, xtol=1e-6)
+    z_alpha = stats.norm.isf(alpha / 2 if two_sided else alpha)
+    return float((drift / (z_alpha + stats.norm.ppf(power))) ** 2)
+
+
+def _inflation_grid(np: Any, axes: Dict[str, Any], spending: Optional[str], two_sided: bool) -> Any:
+    alpha, power, looks = (_axis_view(np, axes, name) for name in ("alpha", "power", "looks"))
+    alpha, power, looks = np.broadcast_arrays(alpha, power, looks)
+    inflation = np.empty(alpha.shape)
+    for index in np.ndindex(alpha.shape):
+        inflation[index] = inflation_factor(
+            float(alpha[index]), float(power[index]), int(looks[index]), spending, two_sided
+        )
+    return inflation
+
+
+def _total_size(np: Any, p1: Any, p2: Any, allocation: Any, z_alpha: Any, z_beta: Any) -> Any:
+    """Fixed-design total sample size for a pooled two-proportion z-test."""
+
+    pooled = (1 - allocation) * p1 + allocation * p2
+    null_sd = np.sqrt(pooled * (1 - pooled) * (1 / (1 - allocation) + 1 / allocation))
+    alternative_sd = np.sqrt(p1 * (1 - p1) / (1 - allocation) + p2 * (1 - p2) / allocation)
+    return ((z_alpha * null_sd + z_beta * alternative_sd) / (p2 - p1)) ** 2
+
+
+def _critical_values(np: Any, stats: Any, axes: Dict[str, Any], two_sided: bool) -> Tuple[Any, Any]:
+    alpha = _axis_view(np, axes, "alpha")
+    z_alpha = stats.norm.isf(alpha / 2 if two_sided else alpha)
+    return z_alpha, stats.norm.ppf(_axis_view(np, axes, "power"))
+
+
+@traced("planning.sample_size_grid")
+def sample_size_grid(
+    baseline: Axis,
+    mde: Axis,
+    allocation: Axis = 0.5,
+    alpha: Axis = 0.05,
+    power: Axis = 0.8,
+    looks: Axis = 1,
+    *,
+    relative: bool = False,
+    two_sided: bool = True,
+    spending: Optional[str] = None,
+    daily_traffic: Optional[float] = None,
+) -> PlanGrid:
+    """Required sample sizes over every combination of the planning axes.
+
+    ``mde`` is an absolute lift in conversion rate, or a lift relative to the
+    baseline when ``relative`` is set. ``allocation`` is the treatment share
+    of traffic (``1/3`` for a 1:2 split). Sizes are the maximum across looks
+    for sequential designs, and ``days`` is filled in when ``daily_traffic``
+    (eligible visitors per day) is given. Scenarios whose treatment rate falls
+    outside ``(0, 1)`` have NaN sizes.
+    """
+
+    np = _import_optional("numpy")
+    stats = _import_optional("scipy.stats")
+    axes = _build_axes(
+        np, baseline=baseline, mde=mde, allocation=allocation, alpha=alpha, power=power, looks=looks
+    )
+    _validate(np, axes, spending)
+    p1 = _axis_view(np, axes, "baseline")
+    lift = _axis_view(np, axes, "mde")
+    p2 = p1 * (1 + lift) if relative else p1 + lift
+    valid = (p2 > 0) & (p2 < 1) & (p2 != p1)
+    z_alpha, z_beta = _critical_values(np, stats, axes, two_sided)
+    share = _axis_view(np, axes, "allocation")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = _total_size(np, p1, np.where(valid, p2, np.nan), share, z_alpha, z_beta)
+    total = total * _inflation_grid(np, axes, spending, two_sided)
+    control = np.ceil(total * (1 - share))
+    treatment = np.ceil(total * share)
+    values = {
+        "treatment_rate": np.where(valid, p2, np.nan),
+        "control_size": control,
+        "treatment_size": treatment,
+        "sample_size": control + treatment,
+    }
+    if daily_traffic is not None:
+        values["days"] = np.ceil(values["sample_size"] / daily_traffic)
+    settings = {"relative": relative, "two_sided": two_sided, "spending": spending, "daily_traffic": daily_traffic}
+    return PlanGrid(axes=axes, values=values, settings=settings)
+
+
+def _lift_gap(
+    np: Any, lift: Any, p1: Any, allocation: Any, z_alpha: Any, z_beta: Any, root_budget: Any
+) -> Tuple[Any, Any]:
+    """Residual of ``z_alpha * null_sd + z_beta * alternative_sd = sqrt(budget) * lift`` and its slope.
+
+    This is the square root of the :func:`_total_size` equation; the residual
+    is positive while ``lift`` is too small to detect.
+    """
+
+    p2 = p1 + lift
+    pooled = p1 + allocation * lift
+    scale = 1 / (1 - allocation) + 1 / allocation
+    null_sd = np.sqrt(scale * pooled * (1 - pooled))
+    alternative_sd = np.sqrt(p1 * (1 - p1) / (1 - allocation) + p2 * (1 - p2) / allocation)
+    gap = z_alpha * null_sd + z_beta * alternative_sd - root_budget * lift
+    slope = (
+        z_alpha * scale * allocation * (1 - 2 * pooled) / (2 * null_sd)
+        + z_beta * (1 - 2 * p2) / (2 * allocation * alternative_sd)
+        - root_budget
+    )
+    return gap, slope
+
+
+@traced("planning.achievable_mde_grid")
+def achievable_mde_grid(
+    baseline: Axis,
+    sample_size: Axis,
+    allocation: Axis = 0.5,
+    alpha: Axis = 0.05,
+    power: Axis = 0.8,
+    looks: Axis = 1,
+    *,
+    relative: bool = False,
+    two_sided: bool = True,
+    spending: Optional[str] = None,
+    iterations: int = 40,
+    tolerance: float = 1e-10,
+) -> PlanGrid:
+    """Smallest detectable upward lift for a total ``sample_size`` (e.g. ``daily_traffic * days``).
+
+    The grid is solved by vectorized Newton iteration, safeguarded by a
+    bisection bracket, so most scenarios reach ``tolerance`` (relative to the
+    lift) within a handful of passes and each pass only touches the scenarios
+    still moving. Any left after ``iterations`` passes report the detectable
+    end of their bracket. Scenarios too small to detect any lift are NaN.
+    """
+
+    np = _import_optional("numpy")
+    stats = _import_optional("scipy.stats")
+    axes = _build_axes(
+        np, baseline=baseline, sample_size=sample_size, allocation=allocation, alpha=alpha, power=power, looks=looks
+    )
+    _validate(np, axes, spending)
+    p1 = _axis_view(np, axes, "baseline")
+    share = _axis_view(np, axes, "allocation")
+    z_alpha, z_beta = _critical_values(np, stats, axes, two_sided)
+    budget = _axis_view(np, axes, "sample_size") / _inflation_grid(np, axes, spending, two_sided)
+
+    shape = np.broadcast_shapes(p1.shape, share.shape, z_alpha.shape, z_beta.shape, budget.shape)
+    lift = np.full(shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # The required size falls as the lift grows, so a lift is detectable at all
+        # exactly when the largest one is.
+        detectable = _total_size(np, p1, 1.0, share, z_alpha, z_beta) <= budget
+        detectable = np.flatnonzero(np.broadcast_to(detectable, shape))
+        grids = [np.broadcast_to(value, shape) for value in (p1, share, z_alpha, z_beta, np.sqrt(budget))]
+        # Chunks keep every temporary cache-sized, which matters more than the
+        # per-call overhead once the grid runs to millions of scenarios.
+        for start in range(0, detectable.size, _SOLVE_CHUNK):
+            chunk = detectable[start : start + _SOLVE_CHUNK]
+            position = np.unravel_index(chunk, shape)
+            lift.flat[chunk] = _solve_lift(np, [grid[position] for grid in grids], tolerance, iterations)
+    values = {"mde": lift / p1 if relative else lift, "treatment_rate": p1 + lift}
+    settings = {"relative": relative, "two_sided": two_sided, "spending": spending}
+    return PlanGrid(axes=axes, values=values, settings=settings)
+
+
+def _solve_lift(np: Any, inputs: List[Any], tolerance: float, iterations: int) -> Any:
+    """Detectable lifts for flat ``(baseline, allocation, z_alpha, z_beta, sqrt(budget))`` arrays."""
+
+    baselines, shares, alphas, betas, root_budgets = inputs
+    # Both standard deviations are at most sqrt(scale) / 2, which bounds the
+    # root far more tightly than 1 - baseline once the budget is large.
+    spread = np.sqrt(1 / (1 - shares) + 1 / shares) / 2
+    high = np.minimum(1 - baselines, (alphas + np.maximum(betas, 0)) * spread / root_budgets)
+    low = np.zeros(high.shape)
+    current = high
+    index = np.arange(high.size)
+    lift = np.empty(high.shape)
+    for _ in range(iterations):
+        if not index.size:
+            break
+        gap, slope = _lift_gap(np, current, *inputs)
+        enough = gap <= 0
+        high = np.where(enough, current, high)
+        low = np.where(enough, low, current)
+        # Newton steps that leave the bracket are replaced by bisection.
+        step = current - gap / slope
+        step = np.where((step >= low) & (step <= high), step, (low + high) / 2)
+        settled = np.abs(step - current) <= tolerance * step
+        lift[index[settled]] = step[settled]
+        # Only scenarios still moving are carried into the next pass.
+        moving = ~settled
+        index, current, high, low = index[moving], step[moving], high[moving], low[moving]
+        inputs = [value[moving] for value in inputs]
+    lift[index] = high
+    return lift
+
+
+def _simulate_chunk(task: Tuple[Any, ...]) -> int:
+    """Count rejections across one chunk of simulated experiments."""
+
+    np = _import_optional("numpy")
+    p1, p2, control, treatment, bounds, two_sided, simulations, entropy, key = task
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=key))
+    looks = len(bounds)
+    control_at = np.round(np.arange(1, looks + 1) / looks * control).astype(np.int64)
+    treatment_at = np.round(np.arange(1, looks + 1) / looks * treatment).astype(np.int64)
+    control_hits = rng.binomial(np.diff(control_at, prepend=0), p1, size=(simulations, looks)).cumsum(axis=1)
+    treatment_hits = rng.binomial(np.diff(treatment_at, prepend=0), p2, size=(simulations, looks)).cumsum(axis=1)
+    pooled = (control_hits + treatment_hits) / (control_at + treatment_at)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (treatment_hits / treatment_at - control_hits / control_at) / np.sqrt(
+            pooled * (1 - pooled) * (1 / control_at + 1 / treatment_at)
+        )
+    z = np.nan_to_num(z)
+    crossed = np.abs(z) >= bounds if two_sided else z >= bounds
+    return int(crossed.any(axis=1).sum())
+
+
+@traced("planning.simulate_power")
+def simulate_power(
+    scenarios: Sequence[Dict[str, Any]],
+    *,
+    simulations: int = 20000,
+    spending: Optional[str] = None,
+    two_sided: bool = True,
+    seed: int = 0,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Monte Carlo rejection rates for explicit scenarios.
+
+    Each scenario needs ``baseline``, ``treatment_rate``, ``control_size``,
+    ``treatment_size``, ``alpha`` and optionally ``looks``. Simulations are
+    split into fixed chunks, each seeded from ``(seed, scenario, chunk)``, so
+    results do not depend on ``workers``. ``workers=1`` runs in process.
+    """
+
+    tasks = []
+    owners = []
+    for position, scenario in enumerate(scenarios):
+        bounds = spending_boundaries(float(scenario["alpha"]), int(scenario.get("looks", 1)), spending, two_sided)
+        for chunk, start in enumerate(range(0, simulations, _CHUNK_SIMULATIONS)):
+            tasks.append(
+                (
+                    float(scenario["baseline"]),
+                    float(scenario["treatment_rate"]),
+                    int(scenario["control_size"]),
+                    int(scenario["treatment_size"]),
+                    bounds,
+                    two_sided,
+                    min(_CHUNK_SIMULATIONS, simulations - start),
+                    seed,
+                    (position, chunk),
+                )
+            )
+            owners.append(position)
+
+    if workers == 1 or len(tasks) == 1:
+        counts = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            counts = list(pool.map(_simulate_chunk, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    rejections = [0] * len(scenarios)
+    for position, count in zip(owners, counts):
+        rejections[position] += count
+    results = []
+    for scenario, rejected in zip(scenarios, rejections):
+        rate = rejected / simulations
+        results.append({**scenario, "simulated_power": rate, "standard_error": math.sqrt(rate * (1 - rate) / simulations)})
+    return results
+
+
+def cross_check(
+    plan: PlanGrid,
+    scenarios: int = 20,
+    *,
+    simulations: int = 20000,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    tolerance: float = 0.02,
+) -> List[Dict[str, Any]]:
+    """Validate a :func:`sample_size_grid` plan by simulating a random sample of its scenarios.
+
+    Each result reports the planned ``power`` next to ``simulated_power`` and
+    ``agrees``: whether the gap is within ``tolerance`` plus four standard errors.
+    """
+
+    if "sample_size" not in plan.values:
+        raise ValueError("Cross-checks need a plan from sample_size_grid")
+    np = _import_optional("numpy")
+    rng = np.random.default_rng(seed)
+    valid = np.flatnonzero(np.isfinite(plan["sample_size"]).ravel())
+    chosen = np.sort(rng.choice(valid, size=min(scenarios, len(valid)), replace=False))
+    picked = [plan.scenario(int(index)) for index in chosen]
+    results = simulate_power(
+        picked,
+        simulations=simulations,
+        spending=plan.settings["spending"],
+        two_sided=plan.settings["two_sided"],
+        seed=seed,
+        workers=workers,
+    )
+    for result in results:
+        gap = abs(result["simulated_power"] - result["power"])
+        result["agrees"] = bool(gap <= tolerance + 4 * result["standard_error"])
+    return results
@@ -0,0 +1,408 @@
+"""Read-only, memory-mapped column buffers shared across sessions and processes."""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .formats import open_reader
+from .models import DatasetReference
+
+_FLUSH_ROWS = 65536
+_MANIFEST = "manifest.json"
+
+_STORES: Dict[str, "SharedColumnStore"] = {}
+_STORES_LOCK = threading.RLock()
+
+
+class _Column:
+    """Shared by both column kinds: lifetime, pickling, and memory accounting.
+
+    A column keeps the handle it came from alive, so the maps stay open for as
+    long as a cell holds the column, even if the handle itself was never bound.
+    """
+
+    name: str
+    dataset: Optional["SharedDataset"]
+
+    def _bind(self, dataset: "SharedDataset"):
+        column = object.__new__(type(self))
+        column.__dict__.update(self.__dict__, dataset=dataset)
+        return column
+
+    def memory_usage(self, deep: bool = False) -> int:
+        # The mapped pages are shared by every session, so only the wrapper is private.
+        return sys.getsizeof(self)
+
+    def __reduce__(self):
+        if self.dataset is None:
+            raise TypeError(f"Column {self.name!r} is not attached to a dataset handle")
+        return (_reacquire_column, (*self.dataset.__reduce__()[1], self.name))
+
+
+class NumericColumn(_Column):
+    """A read-only float64 column backed by a shared memory map."""
+
+    kind = "numeric"
+
+    def __init__(self, name: str, values: memoryview):
+        self.name = name
+        self.dataset = None
+        self._values = values
+
+    @property
+    def buffer(self) -> memoryview:
+        """The underlying read-only buffer, e.g. for ``numpy.frombuffer``."""
+
+        return self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index: Union[int, slice]):
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._values)
+
+    def __repr__(self) -> str:
+        return f"NumericColumn({self.name!r}, rows={len(self)})"
+
+
+class TextColumn(_Column):
+    """A read-only UTF-8 column stored as offsets into a shared byte buffer."""
+
+    kind = "text"
+
+    def __init__(self, name: str, offsets: memoryview, data: memoryview):
+        self.name = name
+        self.dataset = None
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return max(len(self._offsets) - 1, 0)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("column index out of range")
+        return bytes(self._data[self._offsets[index] : self._offsets[index + 1]]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def __repr__(self) -> str:
+        return f"TextColumn({self.name!r}, rows={len(self)})"
+
+
+class _MappedDataset:
+    """Memory maps for one cached dataset, shared by every handle in the process.
+
+    A shared lock on the manifest marks the cache directory as in use, so other
+    processes do not prune it while it is mapped here.
+    """
+
+    def __init__(self, key: str, directory: Path):
+        self._manifest = (directory / _MANIFEST).open("rb")
+        fcntl.flock(self._manifest, fcntl.LOCK_SH)
+        manifest = json.loads(self._manifest.read())
+        self.key = key
+        self.rows: int = manifest["rows"]
+        self.refcount = 0
+        self._maps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+        self.columns: Dict[str, Union[NumericColumn, TextColumn]] = {}
+        for index, column in enumerate(manifest["columns"]):
+            name = column["name"]
+            if column["kind"] == "numeric":
+                values = self._map(directory / f"{index}.f64", "d")
+                self.columns[name] = NumericColumn(name, values)
+            else:
+                offsets = self._map(directory / f"{index}.off", "q")
+                data = self._map(directory / f"{index}.txt", "B")
+                self.columns[name] = TextColumn(name, offsets, data)
+
+    def _map(self, path: Path, fmt: str) -> memoryview:
+        if path.stat().st_size == 0:
+            view = memoryview(b"")
+        else:
+            with path.open("rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            view = memoryview(mapped)
+        typed = view.cast(fmt)
+        self._views.extend((typed, view))
+        return typed
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # A cell still holds a slice of the buffer; the map is freed
+                # once that last export goes away.
+                pass
+        self._views.clear()
+        self._maps.clear()
+        self._manifest.close()
+
+
+class SharedDataset:
+    """A handle on a shared, column-oriented dataset.
+
+    Handles are reference counted by their store. Call :meth:`release` (or use
+    the handle as a context manager) when done; a handle that is garbage
+    collected, together with every column taken from it, is released
+    automatically. The underlying maps are closed once no handle in the
+    process uses them.
+    """
+
+    def __init__(self, store: "SharedColumnStore", reference: DatasetReference, mapped: _MappedDataset):
+        self._store = store
+        self._reference = reference
+        self._mapped: Optional[_MappedDataset] = mapped
+        self._finalizer = weakref.finalize(self, store._release, mapped)
+
+    @property
+    def name(self) -> str:
+        return self._reference.name
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._require().columns)
+
+    @property
+    def released(self) -> bool:
+        return self._mapped is None
+
+    def __len__(self) -> int:
+        return self._require().rows
+
+    def __getitem__(self, column: str) -> Union[NumericColumn, TextColumn]:
+        return self._require().columns[column]._bind(self)
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+    def __reduce__(self):
+        # Pickled handles (e.g. in spilled namespaces) re-attach to the host cache.
+        return (_reacquire, (str(self._store.cache_dir), self._reference.to_dict()))
+
+    def memory_usage(self, deep: bool = False) -> int:
+        return sys.getsizeof(self)
+
+    def __repr__(self) -> str:
+        state = "released" if self.released else f"rows={len(self)}"
+        return f"SharedDataset({self.name!r}, {state})"
+
+    def release(self) -> None:
+        if self._mapped is not None:
+            self._mapped = None
+            self._finalizer()
+
+    def _require(self) -> _MappedDataset:
+        if self._mapped is None:
+            raise ValueError(f"Dataset handle {self.name!r} has been released")
+        return self._mapped
+
+
+class SharedColumnStore:
+    """Caches datasets as column files on disk and maps them read-only.
+
+    The on-disk cache is keyed by the source path, size, and modification time,
+    so it is built once per host and reused by every process pointing at the
+    same ``cache_dir``. Within a process, handles to the same dataset share one
+    set of memory maps. Caches of older versions of a dataset are deleted once
+    no process maps them any more.
+
+    The first store created for a ``cache_dir`` becomes the process-wide store
+    returned by :func:`shared_store`, which unpickled handles re-attach to.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+        self._entries: Dict[str, _MappedDataset] = {}
+        self._lock = threading.Lock()
+        with _STORES_LOCK:
+            _STORES.setdefault(_store_key(self.cache_dir), self)
+
+    def acquire(self, reference: DatasetReference) -> SharedDataset:
+        directory = self._ensure_cached(reference)
+        key = directory.name
+        with self._lock:
+            mapped = self._entries.get(key)
+            if mapped is None:
+                mapped = _MappedDataset(key, directory)
+                self._entries[key] = mapped
+            mapped.refcount += 1
+        self._prune(directory)
+        return SharedDataset(self, reference, mapped)
+
+    def refcount(self, reference: DatasetReference) -> int:
+        mapped = self._entries.get(self._cache_key(reference))
+        return mapped.refcount if mapped else 0
+
+    def _release(self, mapped: _MappedDataset) -> None:
+        with self._lock:
+            mapped.refcount -= 1
+            if mapped.refcount > 0:
+                return
+            self._entries.pop(mapped.key, None)
+        mapped.close()
+
+    def _cache_key(self, reference: DatasetReference) -> str:
+        source = Path(reference.path)
+        stat = source.stat()
+        fingerprint = f"{source}:{stat.st_size}:{stat.st_mtime_ns}:{reference.format}"
+        digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+        safe_name = "".join(char if char.isalnum() else "_" for char in reference.name)
+        return f"{safe_name}-{digest}"
+
+    def _ensure_cached(self, reference: DatasetReference) -> Path:
+        directory = self.cache_dir / self._cache_key(reference)
+        if (directory / _MANIFEST).exists():
+            return directory
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".build-", dir=self.cache_dir))
+        try:
+            _build_columns(reference, staging)
+            try:
+                os.rename(staging, directory)
+            except OSError:
+                # Another process published the same cache first.
+                if not (directory / _MANIFEST).exists():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return directory
+
+    def _prune(self, current: Path) -> None:
+        """Delete caches of older versions of ``current``'s dataset that no process maps."""
+
+        prefix = current.name.rpartition("-")[0]
+        for directory in self.cache_dir.iterdir():
+            if directory == current or directory.name.rpartition("-")[0] != prefix:
+                continue
+            try:
+                with (directory / _MANIFEST).open("rb") as manifest:
+                    fcntl.flock(manifest, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    shutil.rmtree(directory)
+            except OSError:
+                # Still mapped by some process, or already pruned by another.
+                continue
+
+
+def _build_columns(reference: DatasetReference, directory: Path) -> None:
+    reader = open_reader(reference)
+    headers = reader.headers()
+    writers = [_ColumnWriter(directory, index) for index in range(len(headers))]
+    rows = 0
+    for row in reader.iter_rows():
+        for writer, value in zip(writers, row):
+            writer.append(value)
+        rows += 1
+        if rows % _FLUSH_ROWS == 0:
+            for writer in writers:
+                writer.flush()
+
+    columns = []
+    for name, writer in zip(headers, writers):
+        columns.append({"name": name, "kind": writer.finish()})
+    manifest = {"name": reference.name, "rows": rows, "columns": columns}
+    (directory / _MANIFEST).write_text(json.dumps(manifest))
+
+
+class _ColumnWriter:
+    """Streams one column to disk as both float64 and text until a value rules out floats."""
+
+    def __init__(self, directory: Path, index: int):
+        self._numeric_path = directory / f"{index}.f64"
+        self._offsets_path = directory / f"{index}.off"
+        self._text_path = directory / f"{index}.txt"
+        self._numeric_file = self._numeric_path.open("wb")
+        self._offsets_file = self._offsets_path.open("wb")
+        self._text_file = self._text_path.open("wb")
+        self._numbers: Optional[array] = array("d")
+        self._offsets = array("q", [0])
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            value = ""
+        if self._numbers is not None:
+            try:
+                self._numbers.append(float(value) if value != "" else float("nan"))
+            except (TypeError, ValueError):
+                self._numbers = None
+                self._numeric_file.close()
+        encoded = str(value).encode("utf-8")
+        self._chunks.append(encoded)
+        self._position += len(encoded)
+        self._offsets.append(self._position)
+
+    def flush(self) -> None:
+        if self._numbers is not None:
+            self._numbers.tofile(self._numeric_file)
+            self._numbers = array("d")
+        self._offsets.tofile(self._offsets_file)
+        self._offsets = array("q")
+        self._text_file.write(b"".join(self._chunks))
+        self._chunks.clear()
+
+    def finish(self) -> str:
+        self.flush()
+        self._offsets_file.close()
+        self._text_file.close()
+        if self._numbers is not None:
+            self._numeric_file.close()
+            self._offsets_path.unlink()
+            self._text_path.unlink()
+            return "numeric"
+        self._numeric_path.unlink()
+        return "text"
+
+
+def _store_key(directory: Path) -> str:
+    return str(directory.resolve())
+
+
+def shared_store(cache_dir: Optional[Union[str, Path]] = None) -> SharedColumnStore:
+    """Return the process-wide store for ``cache_dir`` (a host temp directory by default)."""
+
+    directory = Path(cache_dir) if cache_dir is not None else Path(tempfile.gettempdir()) / "pairide-shared"
+    with _STORES_LOCK:
+        store = _STORES.get(_store_key(directory))
+        if store is None:
+            store = SharedColumnStore(directory)
+        return store
+
+
+def _reacquire(cache_dir: str, reference: Dict[str, object]) -> SharedDataset:
+    return shared_store(cache_dir).acquire(DatasetReference.from_dict(reference))
+
+
+def _reacquire_column(cache_dir: str, reference: Dict[str, object], name: str) -> Union[NumericColumn, TextColumn]:
+    return _reacquire(cache_dir, reference)[name]
@@ -0,0 +1,291 @@
+"""Embedded SQL engine over registered datasets."""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from .formats import open_reader
+from .models import DatasetReference
+from .telemetry import telemetry, traced
+
+_INSERT_BATCH = 5000
+_METADATA_TABLE = "_pairide_datasets"
+_STAGING_TABLE = "temp._pairide_staging"
+_CANONICAL_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_value(value: Any) -> Any:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (str, int, float, bytes)):
+        return value
+    return str(value)
+
+
+def _numeric_safe(value: Any) -> bool:
+    """Whether NUMERIC affinity would store ``value`` without changing what it means.
+
+    Text such as ``"007"``, ``"+5"`` or a 20-digit ID would lose leading zeros,
+    signs or precision when converted, so it must stay TEXT.
+    """
+
+    if not isinstance(value, str):
+        return True
+    if not _CANONICAL_NUMBER.fullmatch(value):
+        return False
+    number = Decimal(value)
+    if number == number.to_integral_value() and abs(number) < 2**63:
+        return True
+    return Decimal(repr(float(value))) == number
+
+
+def _authorize_read(action: int, *_: object) -> int:
+    return sqlite3.SQLITE_OK if action in _READ_ACTIONS else sqlite3.SQLITE_DENY
+
+
+@dataclass
+class QueryPage:
+    """One page of a query result."""
+
+    columns: List[str]
+    rows: List[List[Any]]
+    offset: int
+    has_more: bool
+    duration: float
+    plan: Optional[List[str]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "rows": self.rows,
+            "offset": self.offset,
+            "has_more": self.has_more,
+            "duration": self.duration,
+            "plan": self.plan,
+        }
+
+
+@dataclass
+class _Fingerprint:
+    path: str
+    size: int
+    mtime_ns: int
+    format: str
+    indexes: List[str] = field(default_factory=list)
+
+    @classmethod
+    def of(cls, reference: DatasetReference) -> "_Fingerprint":
+        stat = Path(reference.path).stat()
+        return cls(
+            path=reference.path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            format=reference.format.lower(),
+            indexes=list(reference.indexes),
+        )
+
+
+class QueryEngine:
+    """Runs SQL against datasets ingested into a persistent SQLite file.
+
+    Each dataset becomes a table named after it, with NUMERIC affinity for
+    columns whose values all convert losslessly and TEXT otherwise. Tables are
+    ingested once with bulk inserts and re-ingested only when the source file's size, modification
+    time, format, or declared indexes change. User queries run on a separate
+    read-only connection whose authorizer also rejects PRAGMA, ATTACH, and any
+    other non-read statement, so they cannot modify the cache.
+    """
+
+    def __init__(self, path: Union[str, Path], slow_query_seconds: float = 1.0):
+        self.path = Path(path)
+        self.slow_query_seconds = slow_query_seconds
+        self._connection: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {_METADATA_TABLE} ("
+                "name TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime_ns INTEGER, "
+                "format TEXT, indexes TEXT, rows INTEGER)"
+            )
+            connection.execute("PRAGMA query_only=ON")
+            self._connection = connection
+        return self._connection
+
+    def _read_connection(self) -> sqlite3.Connection:
+        if self._reader is None:
+            self._connect()
+            reader = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False, isolation_level=None
+            )
+            reader.set_authorizer(_authorize_read)
+            self._reader = reader
+        return self._reader
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in (self._reader, self._connection):
+                if connection is not None:
+                    connection.close()
+            self._reader = None
+            self._connection = None
+
+    def is_current(self, reference: DatasetReference) -> bool:
+        connection = self._connect()
+        row = connection.execute(
+            f"SELECT path, size, mtime_ns, format, indexes FROM {_METADATA_TABLE} WHERE name = ?",
+            (reference.name,),
+        ).fetchone()
+        if row is None:
+            return False
+        current = _Fingerprint.of(reference)
+        stored = _Fingerprint(row[0], row[1], row[2], row[3], row[4].split(";") if row[4] else [])
+        return stored == current
+
+    def ensure_ingested(self, reference: DatasetReference) -> bool:
+        """Ingest ``reference`` if its table is missing or stale; return whether it ran."""
+
+        with self._lock:
+            if self.is_current(reference):
+                return False
+            self._ingest(reference)
+            return True
+
+    @traced("sql.ingest")
+    def _ingest(self, reference: DatasetReference) -> None:
+        fingerprint = _Fingerprint.of(reference)
+        table = quote_identifier(reference.name)
+        connection = self._connect()
+        connection.execute("PRAGMA query_only=OFF")
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            reader = open_reader(reference)
+            headers = reader.headers()
+            # Rows land untyped in a staging table first, so each column's
+            # affinity can be chosen from all of its values in one pass.
+            names = [quote_identifier(header) for header in headers]
+            connection.execute(f"DROP TABLE IF EXISTS {_STAGING_TABLE}")
+            connection.execute(f"CREATE TABLE {_STAGING_TABLE} ({', '.join(names)})")
+            placeholders = ", ".join("?" for _ in headers)
+            insert = f"INSERT INTO {_STAGING_TABLE} VALUES ({placeholders})"
+            numeric = [True] * len(headers)
+            source = reader.iter_rows()
+            rows = 0
+            while True:
+                batch = [[_sql_value(value) for value in row] for row in islice(source, _INSERT_BATCH)]
+                if not batch:
+                    break
+                for position, candidate in enumerate(numeric):
+                    if candidate and not all(_numeric_safe(row[position]) for row in batch):
+                        numeric[position] = False
+                connection.executemany(insert, batch)
+                rows += len(batch)
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+            columns = ", ".join(
+                f"{name} {'NUMERIC' if candidate else 'TEXT'}" for name, candidate in zip(names, numeric)
+            )
+            connection.execute(f"CREATE TABLE {table} ({columns})")
+            connection.execute(f"INSERT INTO {table} SELECT * FROM {_STAGING_TABLE}")
+            connection.execute(f"DROP TABLE {_STAGING_TABLE}")
+            for index in fingerprint.indexes:
+                index_columns = [column.strip() for column in index.split(",")]
+                index_name = quote_identifier(f"ix_{reference.name}_{'_'.join(index_columns)}")
+                column_list = ", ".join(quote_identifier(column) for column in index_columns)
+                connection.execute(f"CREATE INDEX {index_name} ON {table} ({column_list})")
+            connection.execute(
+                f"INSERT OR REPLACE INTO {_METADATA_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    reference.name,
+                    fingerprint.path,
+                    fingerprint.size,
+                    fingerprint.mtime_ns,
+                    fingerprint.format,
+                    ";".join(fingerprint.indexes),
+                    rows,
+                ),
+            )
+            connection.execute("COMMIT")
+            telemetry.count("sql.rows_ingested", rows)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.execute("PRAGMA query_only=ON")
+
+    def query(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        references: Iterable[DatasetReference] = (),
+        *,
+        limit: int = 100,
+        offset: int = 0,
+        explain: bool = False,
+    ) -> QueryPage:
+        """Return one page of results; the plan is attached on request or for slow queries."""
+
+        with self._lock:
+            for reference in references:
+                self.ensure_ingested(reference)
+            connection = self._read_connection()
+            paged = f"SELECT * FROM ({sql.strip().rstrip(';')}) LIMIT ? OFFSET ?"
+            start = perf_counter()
+            cursor = connection.execute(paged, (*params, limit + 1, offset))
+            rows = [list(row) for row in cursor.fetchall()]
+            duration = perf_counter() - start
+            telemetry.observe("sql.query_seconds", duration)
+            columns = [description[0] for description in cursor.description or []]
+            plan = None
+            if explain or duration >= self.slow_query_seconds:
+                plan = self.explain(sql, params)
+        return QueryPage(
+            columns=columns,
+            rows=rows[:limit],
+            offset=offset,
+            has_more=len(rows) > limit,
+            duration=duration,
+            plan=plan,
+        )
+
+    def iter_rows(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        references: Iterable[DatasetReference] = (),
+        *,
+        page_size: int = 500,
+    ) -> Iterator[tuple]:
+        """Stream result rows, fetching ``page_size`` rows from SQLite at a time."""
+
+        with self._lock:
+            for reference in references:
+                self.ensure_ingested(reference)
+            cursor = self._read_connection().execute(sql, tuple(params))
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            yield from rows
+
+    def explain(self, sql: str, params: Sequence[Any] = ()) -> List[str]:
+        with self._lock:
+            cursor = self._read_connection().execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params))
+            return [row[-1] for row in cursor.fetchall()]
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Union
 
 from .models import WorkspaceState
+from .telemetry import telemetry
 
 
 class StorageEngine:
@@ -16,12 +17,18 @@ class StorageEngine:
         self.path = Path(path)
 
     def load_state(self) -> WorkspaceState:
-        if not self.path.exists():
-            return WorkspaceState()
-        raw = json.loads(self.path.read_text())
-        return WorkspaceState.from_dict(raw)
+        with telemetry.span("storage.load_state"):
+            if not self.path.exists():
+                return WorkspaceState()
+            text = self.path.read_text()
+            telemetry.observe("storage.state_bytes_read", len(text))
+            raw = json.loads(text)
+            return WorkspaceState.from_dict(raw)
 
     def save_state(self, state: WorkspaceState) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        payload = state.to_dict()
-        self.path.write_text(json.dumps(payload, indent=2))
+        with telemetry.span("storage.save_state"):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            payload = state.to_dict()
+            text = json.dumps(payload, indent=2)
+            telemetry.observe("storage.state_bytes_written", len(text))
+            self.path.write_text(text)
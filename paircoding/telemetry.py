@@ -0,0 +1,332 @@
+"""Low-overhead spans, counters, and histograms for the workspace hot paths.
+
+Instrumentation is off by default. While disabled, :func:`traced` wrappers and
+:meth:`Telemetry.span` cost one attribute check, so the hooks can stay on the
+hot paths permanently. Enable it with ``telemetry.enable()``, the
+``PAIRIDE_PROFILE`` environment variable, or the CLI ``--profile`` flag.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, TypeVar, Union
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Exponential buckets from 10µs (or 10 bytes) upward, doubling 48 times.
+BUCKETS: List[float] = [1e-5 * 2**power for power in range(48)]
+
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("pairide_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Histogram:
+    """Fixed exponential-bucket histogram that merges losslessly."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.maximum
+                return min(upper, self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.minimum if self.count else 0.0,
+            "max": self.maximum if self.count else 0.0,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": list(self.counts),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        histogram = cls()
+        histogram.merge(data)
+        return histogram
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        if not data.get("count"):
+            return
+        for index, bucket_count in enumerate(data["buckets"]):
+            self.counts[index] += bucket_count
+        self.count += data["count"]
+        self.total += data["sum"]
+        self.minimum = min(self.minimum, data["min"])
+        self.maximum = max(self.maximum, data["max"])
+
+
+class JsonlTraceExporter:
+    """Appends one JSON object per finished span to a trace file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._handle: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def export_span(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._handle is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handle = self.path.open("a")
+            self._handle.write(json.dumps(record) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+def _metric_name(name: str) -> str:
+    return "pairide_" + "".join(char if char.isalnum() else "_" for char in name)
+
+
+def prometheus_text(stats: Dict[str, Any]) -> str:
+    """Render :meth:`Telemetry.stats` output in the Prometheus text exposition format."""
+
+    lines: List[str] = []
+    for name, value in sorted(stats.get("counters", {}).items()):
+        metric = _metric_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+    def histogram_lines(metric: str, data: Dict[str, Any], labels: str = "") -> List[str]:
+        output = []
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + [math.inf], data["buckets"]):
+            cumulative += bucket_count
+            le = "+Inf" if bound == math.inf else repr(bound)
+            separator = "," if labels else ""
+            output.append(f'{metric}_bucket{{{labels}{separator}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        output.append(f"{metric}_sum{suffix} {data['sum']}")
+        output.append(f"{metric}_count{suffix} {data['count']}")
+        return output
+
+    spans = stats.get("spans", {})
+    if spans:
+        lines.append("# TYPE pairide_span_seconds histogram")
+        for name, data in sorted(spans.items()):
+            lines += histogram_lines("pairide_span_seconds", data, f'span="{name}"')
+    for name, data in sorted(stats.get("histograms", {}).items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} histogram")
+        lines += histogram_lines(metric, data)
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """Writes the collected stats to a Prometheus text exposition file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def write(self, stats: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary.write_text(prometheus_text(stats))
+        os.replace(temporary, self.path)
+
+
+class Telemetry:
+    """Collects span timings, counters, and histograms in process."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[str, Histogram] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._trace_exporters: List[JsonlTraceExporter] = []
+
+    def enable(self, trace_path: Optional[Union[str, Path]] = None) -> None:
+        if trace_path is not None:
+            self._trace_exporters.append(JsonlTraceExporter(trace_path))
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        for exporter in self._trace_exporters:
+            exporter.close()
+        self._trace_exporters.clear()
+
+    @contextmanager
+    def _recording_span(self, name: str, attributes: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        span_id = next(_span_ids)
+        token = _current_span.set(span_id)
+        started_at = time.time()
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            yield attributes
+        except BaseException as exc:
+            error = exc.__class__.__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            _current_span.reset(token)
+            with self._lock:
+                histogram = self._spans.get(name)
+                if histogram is None:
+                    histogram = self._spans[name] = Histogram()
+                histogram.observe(duration)
+            if self._trace_exporters:
+                record = {
+                    "name": name,
+                    "span_id": span_id,
+                    "parent_id": _current_span.get(),
+                    "start": started_at,
+                    "duration": duration,
+                    "thread": threading.get_ident(),
+                    "attributes": attributes,
+                }
+                if error is not None:
+                    record["error"] = error
+                for exporter in self._trace_exporters:
+                    exporter.export_span(record)
+
+    def span(self, name: str, **attributes: Any):
+        """Time a block; yields a dict that the block may add attributes to."""
+
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._recording_span(name, attributes)
+
+    def count(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of everything collected so far."""
+
+        with self._lock:
+            return {
+                "spans": {name: histogram.to_dict() for name, histogram in self._spans.items()},
+                "histograms": {name: histogram.to_dict() for name, histogram in self._histograms.items()},
+                "counters": dict(self._counters),
+            }
+
+    def merge(self, stats: Dict[str, Any]) -> None:
+        """Fold a previous :meth:`stats` snapshot into this collector."""
+
+        with self._lock:
+            for target, key in ((self._spans, "spans"), (self._histograms, "histograms")):
+                for name, data in stats.get(key, {}).items():
+                    target.setdefault(name, Histogram()).merge(data)
+            for name, value in stats.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._histograms.clear()
+            self._counters.clear()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+telemetry = Telemetry(enabled=bool(os.environ.get("PAIRIDE_PROFILE")))
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate a function so each call is recorded as a span named ``name``."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not telemetry.enabled:
+                return func(*args, **kwargs)
+            with telemetry._recording_span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """Render stats as a human-readable profile table, slowest spans first."""
+
+    lines = [f"{'span':<32} {'count':>8} {'total s':>10} {'mean ms':>10} {'p95 ms':>10} {'max ms':>10}"]
+    spans = sorted(stats.get("spans", {}).items(), key=lambda item: item[1]["sum"], reverse=True)
+    for name, data in spans:
+        histogram = Histogram.from_dict(data)
+        mean = histogram.total / histogram.count if histogram.count else 0.0
+        lines.append(
+            f"{name:<32} {histogram.count:>8} {histogram.total:>10.3f} {mean * 1e3:>10.2f} "
+            f"{histogram.quantile(0.95) * 1e3:>10.2f} {histogram.maximum * 1e3:>10.2f}"
+        )
+    histograms = stats.get("histograms", {})
+    if histograms:
+        lines.append("")
+        lines.append(f"{'histogram':<32} {'count':>8} {'mean':>14} {'p95':>14} {'max':>14}")
+        for name, data in sorted(histograms.items()):
+            histogram = Histogram.from_dict(data)
+            mean = histogram.total / histogram.count if histogram.count else 0.0
+            lines.append(
+                f"{name:<32} {histogram.count:>8} {mean:>14.6g} {histogram.quantile(0.95):>14.6g} "
+                f"{histogram.maximum:>14.6g}"
+            )
+    counters = stats.get("counters", {})
+    if counters:
+        lines.append("")
+        lines.append(f"{'counter':<32} {'value':>14}")
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name:<32} {value:>14.6g}")
+    return "\n".join(lines)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,6 +19,7 @@ from .models import (
     WorkspaceState,
 )
 from .storage import StorageEngine
+from .telemetry import traced
 
 
 def _now() -> str:
@@ -25,18 +27,37 @@ def _now() -> str:
 
 
 class Workspace:
-    """Coordinates notebooks, datasets, and pair-programming sessions."""
+    """Coordinates notebooks, datasets, and pair-programming sessions.
 
-    def __init__(self, storage_path: Path | str = Path(".pairide/state.json"), *, auto_save: bool = True):
+    Cells may run on a worker thread while another thread saves; results are
+    recorded and state is snapshotted for saving under one lock.
+    """
+
+    def __init__(
+        self,
+        storage_path: Path | str = Path(".pairide/state.json"),
+        *,
+        auto_save: bool = True,
+        memory_budget: Optional[int] = None,
+    ):
         self.storage = StorageEngine(storage_path)
         self.state: WorkspaceState = self.storage.load_state()
-        self.datasets = DatasetRegistry(entries=self.state.datasets)
-        self.executor = ExecutionEngine()
+        self.datasets = DatasetRegistry(
+            entries=self.state.datasets,
+            database_path=self.storage.path.parent / "datasets.sqlite",
+        )
+        self.executor = ExecutionEngine(
+            memory_budget=memory_budget,
+            spill_dir=self.storage.path.parent / "spill",
+        )
         self.auto_save = auto_save
+        self._lock = threading.RLock()
 
     def _save(self) -> None:
-        self.state.datasets = self.datasets.to_state()
-        self.storage.save_state(self.state)
+        with self._lock:
+            self.state.datasets = self.datasets.to_state()
+            snapshot = WorkspaceState.from_dict(self.state.to_dict())
+        self.storage.save_state(snapshot)
 
     def _maybe_save(self) -> None:
         if self.auto_save:
@@ -50,14 +71,14 @@ class Workspace:
         return notebook
 
     def add_cell(self, notebook_id: str, cell_type: str, source: str) -> Cell:
-        notebook = self._get_notebook(notebook_id)
+        notebook = self.get_notebook(notebook_id)
         cell = Cell(id=str(uuid.uuid4()), cell_type=cell_type, source=source)
         notebook.cells.append(cell)
         self._maybe_save()
         return cell
 
     def update_cell(self, notebook_id: str, cell_id: str, source: str) -> Cell:
-        notebook = self._get_notebook(notebook_id)
+        notebook = self.get_notebook(notebook_id)
         cell = self._get_cell(notebook, cell_id)
         cell.source = source
         self._maybe_save()
@@ -69,7 +90,7 @@ class Workspace:
         notebook_id: str,
         collaborators: Optional[list[tuple[str, str]]] = None,
     ) -> Session:
-        self._get_notebook(notebook_id)
+        self.get_notebook(notebook_id)
         session_id = str(uuid.uuid4())
         collaborator_models = [
             Collaborator(id=str(uuid.uuid4()), name=person, role=role)
@@ -86,40 +107,53 @@ class Workspace:
         return session
 
     def add_collaborator(self, session_id: str, name: str, role: str = "navigator") -> Collaborator:
-        session = self._get_session(session_id)
+        session = self.get_session(session_id)
         collaborator = Collaborator(id=str(uuid.uuid4()), name=name, role=role)
         session.collaborators.append(collaborator)
         self._maybe_save()
         return collaborator
 
     def post_message(self, session_id: str, author: str, content: str) -> ChatMessage:
-        session = self._get_session(session_id)
+        session = self.get_session(session_id)
         message = ChatMessage(author=author, content=content, timestamp=_now())
         session.chat.append(message)
         self._maybe_save()
         return message
 
-    def register_dataset(self, name: str, path: Path, description: str = "") -> None:
-        self.datasets.register(name, path, description=description)
+    def register_dataset(
+        self,
+        name: str,
+        path: Path,
+        description: str = "",
+        indexes: Optional[list[str]] = None,
+        format: Optional[str] = None,
+    ) -> None:
+        self.datasets.register(name, path, description=description, format=format, indexes=indexes)
         self._maybe_save()
 
-    def preview_dataset(self, name: str, limit: int = 5) -> dict:
-        preview = self.datasets.preview_rows(name, limit=limit)
+    def preview_dataset(self, name: str, limit: int = 5, columns: Optional[list[str]] = None) -> dict:
+        preview = self.datasets.preview_rows(name, limit=limit, columns=columns)
         return {"headers": preview.headers, "rows": preview.rows}
 
-    def dataset_summary(self, name: str) -> dict:
-        return self.datasets.column_summary(name)
+    def dataset_summary(self, name: str, columns: Optional[list[str]] = None) -> dict:
+        return self.datasets.column_summary(name, columns=columns)
 
+    def query(self, sql: str, limit: int = 100, offset: int = 0, explain: bool = False) -> dict:
+        page = self.datasets.query(sql, limit=limit, offset=offset, explain=explain)
+        return page.to_dict()
+
+    @traced("workspace.run_cell")
     def run_cell(self, session_id: str, notebook_id: str, cell_id: str) -> Cell:
-        session = self._get_session(session_id)
+        session = self.get_session(session_id)
         if session.notebook_id != notebook_id:
             raise ValueError("Session is not attached to the given notebook")
 
-        notebook = self._get_notebook(notebook_id)
+        notebook = self.get_notebook(notebook_id)
         cell = self._get_cell(notebook, cell_id)
         result = self.executor.run_cell(session_id, cell, self.datasets)
-        cell.last_result = result
-        session.checkpoints.append(f"{cell.id}:{result.timestamp}")
+        with self._lock:
+            cell.last_result = result
+            session.checkpoints.append(f"{cell.id}:{result.timestamp}")
         self._maybe_save()
         return cell
 
@@ -129,18 +163,21 @@ class Workspace:
     def list_sessions(self) -> Iterable[Session]:
         return self.state.sessions.values()
 
-    def _get_notebook(self, notebook_id: str) -> Notebook:
+    def get_notebook(self, notebook_id: str) -> Notebook:
         try:
             return self.state.notebooks[notebook_id]
         except KeyError as exc:  # noqa: PERF203 clarity
             raise KeyError(f"Unknown notebook {notebook_id}") from exc
 
-    def _get_session(self, session_id: str) -> Session:
+    def get_session(self, session_id: str) -> Session:
         try:
             return self.state.sessions[session_id]
         except KeyError as exc:  # noqa: PERF203 clarity
             raise KeyError(f"Unknown session {session_id}") from exc
 
+    def get_cell(self, notebook_id: str, cell_id: str) -> Cell:
+        return self._get_cell(self.get_notebook(notebook_id), cell_id)
+
     def _get_cell(self, notebook: Notebook, cell_id: str) -> Cell:
         for cell in notebook.cells:
             if cell.id == cell_id:
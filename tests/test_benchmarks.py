@@ -0,0 +1,45 @@
+import copy
+
+import pytest
+
+from benchmarks.suite import compare, run_suite
+
+
+def test_smoke_suite_produces_machine_readable_results() -> None:
+    results = run_suite("smoke", only=["storage.save_state", "datasets.column_summary_projected"], isolate=False)
+
+    assert results["meta"]["scale"] == "smoke"
+    saved = results["results"]["storage.save_state"]
+    assert saved["operations"] == 5
+    assert saved["throughput_unit"] == "bytes/s"
+    assert saved["latency"]["p50"] <= saved["latency"]["p95"] <= saved["latency"]["max"]
+    assert saved["peak_rss_bytes"] > 0
+
+
+def test_compare_flags_regressions_beyond_threshold() -> None:
+    baseline = {
+        "results": {
+            "storage.save_state": {
+                "latency": {"p50": 0.010, "p95": 0.020},
+                "throughput": 1000.0,
+                "peak_rss_bytes": 100_000_000,
+            }
+        }
+    }
+    current = copy.deepcopy(baseline)
+    assert compare(baseline, current) == []
+
+    current["results"]["storage.save_state"]["latency"]["p50"] = 0.015
+    current["results"]["storage.save_state"]["throughput"] = 700.0
+    flagged = {regression.metric for regression in compare(baseline, current, threshold=0.2)}
+    assert flagged == {"latency.p50", "throughput"}
+
+    baseline["meta"] = {"scale": "smoke", "parameters": {"cells": 10}}
+    current["meta"] = {"scale": "small", "parameters": {"cells": 200}}
+    with pytest.raises(ValueError, match="different scale"):
+        compare(baseline, current)
+
+
+def test_isolated_benchmark_that_times_out_is_recorded_as_error() -> None:
+    results = run_suite("smoke", only=["executor.run_cell"], timeout=0.01)
+    assert results["results"]["executor.run_cell"] == {"error": "Timed out after 0.01s"}
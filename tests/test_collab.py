@@ -0,0 +1,150 @@
+import asyncio
+import json
+import random
+from pathlib import Path
+
+from paircoding.collab import _FRAME_LIMIT, CollaborationServer, CollabClient, TextOperation
+from paircoding.workspace import Workspace
+
+
+def test_transform_converges() -> None:
+    rng = random.Random(7)
+    for _ in range(200):
+        document = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        left = _random_splice(rng, document)
+        right = _random_splice(rng, document)
+        left_prime, right_prime = TextOperation.transform(left, right)
+        assert right_prime.apply(left.apply(document)) == left_prime.apply(right.apply(document))
+        composed = left.compose(right_prime)
+        assert composed.apply(document) == right_prime.apply(left.apply(document))
+
+
+def _random_splice(rng: random.Random, document: str) -> TextOperation:
+    position = rng.randint(0, len(document))
+    delete = rng.randint(0, len(document) - position)
+    return TextOperation.splice(len(document), position, delete, rng.choice(["", "x", "yz"]))
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_concurrent_clients_converge(tmp_path: Path) -> None:
+    workspace = Workspace(tmp_path / "state.json")
+    notebook = workspace.create_notebook("Live")
+    cell = workspace.add_cell(notebook.id, "code", "value = 1\n")
+    session = workspace.create_session("Pairing", notebook.id)
+
+    async def scenario() -> None:
+        server = CollaborationServer(workspace, port=0, coalesce_delay=0.005, save_interval=0.05)
+        host, port = await server.start()
+        clients = [CollabClient(host, port) for _ in range(5)]
+        for index, client in enumerate(clients):
+            await client.connect(session.id, f"user{index}")
+
+        rng = random.Random(11)
+        for _ in range(40):
+            for client in clients:
+                document = client.documents[cell.id]
+                position = rng.randint(0, len(document))
+                delete = rng.randint(0, min(2, len(document) - position))
+                client.edit(cell.id, position, delete, rng.choice(["a", "bc", ""]))
+            await asyncio.sleep(0)
+
+        def settled() -> bool:
+            expected = server._documents[cell.id].source
+            return all(client.synchronized and client.documents[cell.id] == expected for client in clients)
+
+        await _wait_until(settled)
+
+        clients[0].edit(cell.id, 0, len(clients[0].documents[cell.id]), "total = 6 * 7\nprint(total)\n")
+        await _wait_until(settled)
+        clients[1].chat("running it")
+        clients[1].run(cell.id)
+        received = []
+        while not any(event["type"] == "result" for event in received):
+            received.append(await asyncio.wait_for(clients[2].events.get(), 5))
+        assert {"chat", "running", "result"} <= {event["type"] for event in received}
+        assert received[-1]["result"]["stdout"] == "42\n"
+
+        for client in clients:
+            await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+    restored = Workspace(tmp_path / "state.json")
+    assert restored.state.notebooks[notebook.id].cells[0].source == "total = 6 * 7\nprint(total)\n"
+    assert restored.state.sessions[session.id].chat[0].content == "running it"
+
+
+def test_server_rejects_foreign_cells_bad_edits_and_bad_frames(tmp_path: Path) -> None:
+    workspace = Workspace(tmp_path / "state.json")
+    mine = workspace.create_notebook("Mine")
+    cell = workspace.add_cell(mine.id, "code", "x = 1\n")
+    session = workspace.create_session("Pairing", mine.id)
+    theirs = workspace.create_notebook("Theirs")
+    secret = workspace.add_cell(theirs.id, "code", "secret = 1\n")
+    workspace.create_session("Other", theirs.id)
+
+    async def scenario() -> None:
+        server = CollaborationServer(workspace, port=0, coalesce_delay=0.001, save_interval=0.05)
+        host, port = await server.start()
+        server._document(theirs.id, secret.id)
+
+        client = CollabClient(host, port)
+        await client.connect(session.id, "mallory")
+        client._send({"type": "edit", "cell_id": secret.id, "version": 0, "ops": ["HACKED ", 11]})
+        client._send({"type": "run", "cell_id": secret.id})
+        for _ in range(2):
+            assert (await asyncio.wait_for(client.events.get(), 5))["type"] == "error"
+
+        client.documents[cell.id] = "x = 1 and more\n"  # diverged local copy
+        client.edit(cell.id, 0, 0, "y")
+        client.edit(cell.id, 0, 0, "z")
+        event = await asyncio.wait_for(client.events.get(), 5)
+        assert event["type"] == "resync" and event["source"] == "x = 1\n"
+        assert client.synchronized
+
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"[1, 2]\n")
+        assert "JSON objects" in json.loads(await reader.readline())["message"]
+        writer.write(b"x" * (_FRAME_LIMIT + 10) + b"\n")
+        assert json.loads(await reader.readline())["message"] == "Frame too large"
+        assert await reader.readline() == b""
+        writer.close()
+
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+    assert workspace.state.notebooks[theirs.id].cells[0].source == "secret = 1\n"
+
+
+def test_failed_runs_report_an_error_and_close_cleanly(tmp_path: Path) -> None:
+    workspace = Workspace(tmp_path / "state.json")
+    notebook = workspace.create_notebook("Live")
+    cell = workspace.add_cell(notebook.id, "code", "x = 1\n")
+    session = workspace.create_session("Pairing", notebook.id)
+
+    def broken(*_: object) -> None:
+        raise RuntimeError("executor crashed")
+
+    workspace.executor.run_cell = broken
+
+    async def scenario() -> None:
+        server = CollaborationServer(workspace, port=0, save_interval=0.05)
+        host, port = await server.start()
+        client = CollabClient(host, port)
+        await client.connect(session.id, "ada")
+        client.run(cell.id)
+        events = [await asyncio.wait_for(client.events.get(), 5) for _ in range(2)]
+        assert [event["type"] for event in events] == ["running", "error"]
+        assert events[1]["message"] == "RuntimeError: executor crashed"
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from paircoding.datasets import DatasetRegistry
+from paircoding.executor import ExecutionEngine, approximate_size
+from paircoding.models import Cell
+
+
+def test_variable_sizes_reported() -> None:
+    engine = ExecutionEngine()
+    cell = Cell(id="c1", cell_type="code", source="small = 1\nlarge = [i for i in range(10000)]")
+
+    result = engine.run_cell("s1", cell, DatasetRegistry())
+
+    assert result.variables == ["large", "small"]
+    assert result.variable_sizes["large"] > result.variable_sizes["small"]
+    assert engine.memory_usage()["s1"] == sum(result.variable_sizes.values())
+
+
+def test_approximate_size_extrapolates_from_sample() -> None:
+    values = [f"row-{index:06d}" * 10 for index in range(10000)]
+    estimate = approximate_size(values, sample=16)
+    exact = approximate_size(values, sample=len(values))
+    assert abs(estimate - exact) / exact < 0.05
+
+
+def test_idle_sessions_spill_and_reload(tmp_path: Path) -> None:
+    engine = ExecutionEngine(memory_budget=50_000, spill_dir=tmp_path)
+    datasets = DatasetRegistry()
+
+    engine.run_cell("idle", Cell(id="c1", cell_type="code", source="rows = [i for i in range(5000)]"), datasets)
+    engine.run_cell("busy", Cell(id="c2", cell_type="code", source="rows = [i for i in range(5000)]"), datasets)
+
+    assert engine.is_spilled("idle")
+    assert not engine.is_spilled("busy")
+    assert (tmp_path / "idle.pickle").exists()
+
+    result = engine.run_cell("idle", Cell(id="c3", cell_type="code", source="print(len(rows))"), datasets)
+    assert result.stdout.strip() == "5000"
+    assert not engine.is_spilled("idle")
+    assert engine.is_spilled("busy")
+
+
+def test_unpicklable_values_stay_resident_while_the_rest_spills(tmp_path: Path) -> None:
+    engine = ExecutionEngine(memory_budget=10_000, spill_dir=tmp_path)
+    datasets = DatasetRegistry()
+    source = "rows = [i for i in range(20000)]\ndef total():\n    return sum(rows)\n"
+
+    engine.run_cell("idle", Cell(id="c1", cell_type="code", source=source), datasets)
+    engine.run_cell("busy", Cell(id="c2", cell_type="code", source=source), datasets)
+
+    assert engine.is_spilled("idle")
+    assert engine.unspillable() == {"idle": ["total"]}
+    assert engine.memory_usage()["idle"] == 0
+
+    result = engine.run_cell("idle", Cell(id="c3", cell_type="code", source="print(total())"), datasets)
+    assert result.stdout.strip() == str(sum(range(20000)))
+    assert engine.unspillable() == {"busy": ["total"]}
+
+
+def test_sizes_are_reused_until_a_name_is_rebound(monkeypatch) -> None:
+    import paircoding.executor as executor
+
+    measured = []
+    monkeypatch.setattr(executor, "approximate_size", lambda value: measured.append(value) or 8)
+    engine = ExecutionEngine()
+    datasets = DatasetRegistry()
+    engine.run_cell("s1", Cell(id="c1", cell_type="code", source="rows = [1, 2]\nlabel = 'a'"), datasets)
+    engine.run_cell("s1", Cell(id="c2", cell_type="code", source="rows.append(3)\nlabel = 'b'"), datasets)
+    assert measured == ["a", [1, 2, 3], "b"]  # rows was mutated in place, not re-measured
+
+
+def test_temporary_spill_directory_is_removed_on_close() -> None:
+    engine = ExecutionEngine(memory_budget=1_000)
+    datasets = DatasetRegistry()
+    for session_id in ("idle", "busy"):
+        engine.run_cell(session_id, Cell(id="c1", cell_type="code", source="rows = [i for i in range(5000)]"), datasets)
+    spill_dir = engine._spill_dir
+    assert engine.is_spilled("idle") and spill_dir.exists()
+
+    engine.close()
+    assert not spill_dir.exists()
+    assert engine.memory_usage() == {}
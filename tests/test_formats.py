@@ -0,0 +1,108 @@
+import bz2
+import gzip
+import lzma
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from paircoding.datasets import DatasetRegistry
+from paircoding.formats import infer_format
+
+CSV_TEXT = "id,score,label\n1,0.5,a\n2,1.5,b\n3,,c\n"
+
+
+@pytest.mark.parametrize(
+    ("suffix", "opener"),
+    [(".csv.gz", gzip.open), (".csv.bz2", bz2.open), (".csv.xz", lzma.open)],
+)
+def test_compressed_csv_preview_and_summary(tmp_path: Path, suffix: str, opener) -> None:
+    path = tmp_path / f"scores{suffix}"
+    with opener(path, "wt") as handle:
+        handle.write(CSV_TEXT)
+
+    registry = DatasetRegistry()
+    reference = registry.register("scores", path)
+    assert reference.format == infer_format(path) == "csv" + suffix[4:]
+
+    preview = registry.preview_rows("scores", limit=2, columns=["label", "id"])
+    assert preview.headers == ["label", "id"]
+    assert preview.rows == [["a", "1"], ["b", "2"]]
+
+    summary = registry.column_summary("scores", columns=["score"])
+    assert list(summary) == ["score"]
+    assert summary["score"]["mean"] == 1.0
+
+
+def test_unknown_format_is_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        DatasetRegistry().register("binary", path, format="hdf5")
+
+
+def test_parquet_projection_and_statistics(tmp_path: Path) -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    table = pyarrow.table(
+        {f"c{index}": [float(index + row) for row in range(100)] for index in range(20)}
+    )
+    path = tmp_path / "wide.parquet"
+    parquet.write_table(table, path, row_group_size=25)
+
+    registry = DatasetRegistry()
+    registry.register("wide", path)
+
+    bounds = registry.column_summary("wide", columns=["c3"], stats=["min", "max", "count"])
+    assert bounds == {"c3": {"min": 3.0, "max": 102.0, "count": 100.0}}
+
+    summary = registry.column_summary("wide", columns=["c1", "c2"])
+    assert summary["c2"]["median"] == 51.5
+    assert registry.preview_rows("wide", limit=1, columns=["c5"]).rows == [["5.0"]]
+
+
+def test_parquet_preview_keeps_null_row_groups(tmp_path: Path) -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    values = [None, None, None, 4.0, 5.0, 6.0]
+    path = tmp_path / "sparse.parquet"
+    parquet.write_table(pyarrow.table({"x": values}), path, row_group_size=3)
+
+    registry = DatasetRegistry()
+    registry.register("sparse", path)
+
+    assert registry.preview_rows("sparse", limit=3, columns=["x"]).rows == [[""]] * 3
+    assert registry.column_summary("sparse", columns=["x"], stats=["count", "mean"]) == {
+        "x": {"count": 3, "mean": 5.0}
+    }
+
+
+def test_parquet_timestamps_fall_back_to_reading_rows(tmp_path: Path) -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    stamps = [datetime(2024, 1, day) for day in range(1, 5)]
+    path = tmp_path / "events.parquet"
+    parquet.write_table(pyarrow.table({"at": stamps, "value": [1.0, 2.0, 3.0, 4.0]}), path, row_group_size=2)
+
+    registry = DatasetRegistry()
+    registry.register("events", path)
+
+    assert registry.column_summary("events", stats=["min", "max", "count"]) == {
+        "value": {"min": 1.0, "max": 4.0, "count": 4.0}
+    }
+
+
+def test_feather_projection(tmp_path: Path) -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    feather = pytest.importorskip("pyarrow.feather")
+    path = tmp_path / "scores.feather"
+    feather.write_feather(pyarrow.table({"id": [1, 2, 3], "score": [0.5, 1.5, None]}), path, chunksize=2)
+
+    registry = DatasetRegistry()
+    registry.register("scores", path)
+
+    assert registry.get("scores").format == "feather"
+    assert registry.preview_rows("scores", limit=5, columns=["score"]).rows == [["0.5"], ["1.5"], [""]]
+    assert registry.column_summary("scores", columns=["score"], stats=["count", "max"]) == {
+        "score": {"count": 2, "max": 1.5}
+    }
@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+from paircoding.cli import main
+from paircoding.grading import Grader, Submission, TestCase
+
+CASES = [
+    TestCase(id="small", function="add", args=[1, 2], expected=3),
+    TestCase(id="large", function="add", args=[10, 20], expected=30),
+    TestCase(id="float", function="mean", args=[[1, 2, 2]], expected=1.6667, tolerance=1e-3),
+]
+
+
+def test_grader_reports_each_outcome_in_order() -> None:
+    submissions = [
+        Submission(id="b-wrong", source="def add(a, b):\n    return a - b\n"),
+        Submission(id="a-good", source="def add(a, b):\n    return a + b\ndef mean(xs):\n    return sum(xs) / len(xs)\n"),
+        Submission(id="c-broken", source="def add(a, b)\n"),
+        Submission(id="d-slow", source="def add(a, b):\n    while True:\n        pass\n"),
+    ]
+    with Grader(workers=2, timeout=0.5) as grader:
+        first = grader.grade(submissions, CASES)
+        second = grader.grade(submissions, CASES)
+
+    statuses = {(result.submission_id, result.case_id): result.status for result in first.results}
+    assert [result.submission_id for result in first.results[::3]] == ["b-wrong", "a-good", "c-broken", "d-slow"]
+    assert {statuses[("a-good", case.id)] for case in CASES} == {"passed"}
+    assert statuses[("b-wrong", "small")] == "failed"
+    assert statuses[("b-wrong", "float")] == "error"
+    assert statuses[("c-broken", "small")] == "error"
+    assert statuses[("d-slow", "small")] == "timeout"
+    assert first.summary()["a-good"]["score"] == 1.0
+    strip = lambda report: [(r.submission_id, r.case_id, r.status, r.detail) for r in report.results]
+    assert strip(first) == strip(second)
+
+
+def test_grader_fixtures_seed_and_cli(tmp_path: Path, capsys) -> None:
+    source = "import random\ndef pick():\n    return (LIMIT, random.random())\n"
+    case = TestCase(id="pick", function="pick")
+    with Grader(workers=2, setup_source="LIMIT = 7\n") as grader:
+        results = grader.grade([Submission(id="x", source=source)] * 2, [case]).results
+    assert results[0].detail == results[1].detail
+    assert "(7, " in results[0].detail
+
+    (tmp_path / "subs").mkdir()
+    (tmp_path / "subs" / "alice.py").write_text("def add(a, b):\n    return a + b\n")
+    cases_path = tmp_path / "cases.json"
+    cases_path.write_text(json.dumps([case.to_dict() for case in CASES[:2]]))
+    assert main(["--state", str(tmp_path / "state.json"), "grade", str(tmp_path / "subs"), str(cases_path)]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["summary"]["alice"]["passed"] == 2
+
+
+def test_cases_cannot_see_each_others_state() -> None:
+    submissions = [
+        Submission(id="evil", source="def size():\n    DATA.append(0)\n    return len(DATA)\n"),
+        Submission(id="honest", source="calls = []\ndef size():\n    calls.append(1)\n    return len(DATA) * len(calls)\n"),
+    ]
+    cases = [TestCase(id=f"c{index}", function="size", expected=3) for index in range(4)]
+    statuses = []
+    for workers in (1, 4):
+        with Grader(workers=workers, fixtures={"DATA": [1, 2, 3]}) as grader:
+            statuses.append([result.status for result in grader.grade(submissions, cases).results])
+    assert statuses[0] == statuses[1] == ["failed"] * 4 + ["passed"] * 4
+
+
+def test_submissions_cannot_change_how_others_are_graded() -> None:
+    submissions = [
+        Submission(id="patch-builtins", source="import builtins\nbuiltins.abs = lambda x: 42\ndef magnitude(x):\n    return 0\n"),
+        Submission(id="patch-grader", source="import paircoding.grading as g\ng._matches = lambda *a: True\ndef magnitude(x):\n    return 0\n"),
+        Submission(id="honest", source="def magnitude(x):\n    return abs(x)\n"),
+        Submission(id="wrong", source="def magnitude(x):\n    return x\n"),
+    ]
+    cases = [TestCase(id=f"c{value}", function="magnitude", args=[value], expected=abs(value)) for value in (-3, -1, 2)]
+    statuses = []
+    for workers in (1, 4):
+        with Grader(workers=workers) as grader:
+            statuses.append([(result.submission_id, result.status) for result in grader.grade(submissions, cases).results])
+    assert statuses[0] == statuses[1]
+    summary = {}
+    for submission_id, status in statuses[0]:
+        summary.setdefault(submission_id, []).append(status)
+    assert summary == {
+        "patch-builtins": ["failed"] * 3,
+        "patch-grader": ["failed"] * 3,
+        "honest": ["passed"] * 3,
+        "wrong": ["failed", "failed", "passed"],
+    }
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from paircoding.planning import (  # noqa: E402
+    achievable_mde_grid,
+    cross_check,
+    inflation_factor,
+    sample_size_grid,
+    spending_boundaries,
+)
+
+
+def test_sample_size_grid_matches_fixed_design_and_round_trips() -> None:
+    plan = sample_size_grid([0.05, 0.1], [0.01, 0.02, 0.95], [1 / 3, 0.5], daily_traffic=1000)
+    assert plan.shape == (2, 3, 2, 1, 1, 1)
+    assert plan.scenario(0)["baseline"] == 0.05
+
+    balanced = plan["control_size"][1, 1, 1, 0, 0, 0]
+    assert balanced == 3841  # textbook size per arm for 10% -> 12%, alpha 0.05, power 0.8
+    assert plan["sample_size"][1, 1, 1, 0, 0, 0] == 2 * balanced
+    assert plan["days"][1, 1, 1, 0, 0, 0] == math.ceil(2 * balanced / 1000)
+    assert plan["sample_size"][1, 1, 0, 0, 0, 0] > 2 * balanced  # a 1:2 split needs more traffic
+    assert math.isnan(plan["sample_size"][1, 2, 0, 0, 0, 0])  # treatment rate above 1
+
+    mde = achievable_mde_grid(0.1, [plan["sample_size"][1, 1, 1, 0, 0, 0], 4], relative=True)
+    assert mde["mde"][0, 0, 0, 0, 0, 0] == pytest.approx(0.2, abs=1e-3)
+    assert math.isnan(mde["mde"][0, 1, 0, 0, 0, 0])
+
+
+def test_achievable_mde_grid_round_trips_at_low_power() -> None:
+    grid = achievable_mde_grid([0.01, 0.3], [20_000, 1_000_000], [0.2, 0.5], [0.01, 0.2], [0.3, 0.9])
+    for record in grid.to_records():
+        plan = sample_size_grid(
+            record["baseline"], record["mde"], record["allocation"], record["alpha"], record["power"]
+        )
+        assert plan["sample_size"].item() == pytest.approx(record["sample_size"], abs=2)
+
+
+def test_spending_boundaries_and_inflation() -> None:
+    obf = spending_boundaries(0.05, 5, "obrien-fleming")
+    pocock = spending_boundaries(0.05, 5, "pocock")
+    assert obf[0] > obf[-1] > 1.96
+    assert max(pocock) - min(pocock) < 0.1
+    assert inflation_factor(0.05, 0.8, 5, "obrien-fleming") == pytest.approx(1.026, abs=0.005)
+    assert inflation_factor(0.05, 0.8, 5, "pocock") > inflation_factor(0.05, 0.8, 5, "obrien-fleming")
+    with pytest.raises(ValueError):
+        sample_size_grid(0.1, 0.02, looks=3)
+
+
+def test_cross_check_agrees_with_simulation() -> None:
+    plan = sample_size_grid([0.1, 0.2], 0.03, [1 / 3, 0.5], looks=[1, 3], spending="obrien-fleming")
+    results = cross_check(plan, scenarios=4, simulations=10000, workers=1)
+    assert len(results) == 4
+    assert all(result["agrees"] for result in results)
+    assert results == cross_check(plan, scenarios=4, simulations=10000, workers=1)
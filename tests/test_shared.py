@@ -0,0 +1,96 @@
+import os
+import pickle
+from pathlib import Path
+
+from paircoding.datasets import DatasetRegistry
+from paircoding.executor import ExecutionEngine
+from paircoding.models import Cell
+from paircoding.shared import SharedColumnStore
+
+
+def _registry(tmp_path: Path) -> DatasetRegistry:
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("city,delay\nOslo,1.5\nLima,\nPune,3\n")
+    registry = DatasetRegistry(shared=SharedColumnStore(tmp_path / "cache"))
+    registry.register("flights", csv_path)
+    return registry
+
+
+def test_load_returns_shared_read_only_columns(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+
+    first = registry.load("flights")
+    second = registry.load("flights")
+
+    assert len(first) == 3
+    assert first.columns == ["city", "delay"]
+    assert first["city"][:] == ["Oslo", "Lima", "Pune"]
+    assert first["delay"][0] == 1.5
+    assert first["delay"].buffer.readonly
+    assert first["delay"].buffer.obj is second["delay"].buffer.obj
+
+    store = registry._shared
+    reference = registry.get("flights")
+    assert store.refcount(reference) == 2
+    first.release()
+    assert store.refcount(reference) == 1
+    second.release()
+    assert store.refcount(reference) == 0
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+def test_handles_round_trip_through_pickle(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+    with registry.load("flights") as handle:
+        restored = pickle.loads(pickle.dumps(handle))
+    assert restored["city"][2] == "Pune"
+    restored.release()
+
+
+def test_cells_load_datasets_and_reset_releases(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+    engine = ExecutionEngine()
+    cell = Cell(id="c1", cell_type="code", source="delays = datasets.load('flights')['delay']\nprint(delays[2])")
+
+    result = engine.run_cell("s1", cell, registry)
+    assert result.stdout.strip() == "3.0"
+
+    engine.run_cell("s1", Cell(id="c2", cell_type="code", source="handle = datasets.load('flights')"), registry)
+    for index in range(3):
+        engine.run_cell("s1", Cell(id=f"t{index}", cell_type="code", source="print(len(datasets.load('flights')))"), registry)
+    assert registry._shared.refcount(registry.get("flights")) == 2
+    assert result.variable_sizes["delays"] < 1024
+    engine.reset("s1")
+    assert registry._shared.refcount(registry.get("flights")) == 0
+
+
+def test_columns_pickle_and_keep_their_handle_alive(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+    reference = registry.get("flights")
+    column = registry.load("flights")["city"]
+    assert registry._shared.refcount(reference) == 1
+    assert column[0] == "Oslo"
+
+    restored = pickle.loads(pickle.dumps(column))
+    assert restored[:] == column[:]
+    assert restored.dataset._store is registry._shared
+    assert registry._shared.refcount(reference) == 2
+    del column, restored
+    assert registry._shared.refcount(reference) == 0
+
+
+def test_stale_caches_are_pruned_once_unmapped(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+    cache = tmp_path / "cache"
+    old = registry.load("flights")
+
+    source = tmp_path / "data.csv"
+    source.write_text("city,delay\nOslo,2.5\n")
+    os.utime(source, ns=(0, 0))
+    with registry.load("flights") as new:
+        assert new["delay"][0] == 2.5
+    assert len(list(cache.iterdir())) == 2  # the old version is still mapped
+
+    old.release()
+    registry.load("flights").release()
+    assert len(list(cache.iterdir())) == 1
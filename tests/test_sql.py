@@ -0,0 +1,80 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from paircoding.cli import main
+from paircoding.workspace import Workspace
+
+
+def _workspace(tmp_path: Path) -> tuple[Workspace, Path]:
+    csv_path = tmp_path / "orders.csv"
+    csv_path.write_text("region,amount\nnorth,10\nsouth,5\nnorth,7\neast,\n")
+    workspace = Workspace(tmp_path / "state.json")
+    workspace.register_dataset("orders", csv_path, indexes=["region"])
+    return workspace, csv_path
+
+
+def test_query_paginates_and_reports_plan(tmp_path: Path) -> None:
+    workspace, _ = _workspace(tmp_path)
+
+    page = workspace.query(
+        "SELECT region, SUM(amount) AS total FROM orders GROUP BY region ORDER BY region",
+        limit=2,
+        explain=True,
+    )
+    assert page["columns"] == ["region", "total"]
+    assert page["rows"] == [["east", None], ["north", 17]]
+    assert page["has_more"] is True
+    assert any("ix_orders_region" in step for step in page["plan"])
+
+    following = workspace.query("SELECT region FROM orders ORDER BY region", limit=2, offset=2)
+    assert following["rows"] == [["north"], ["south"]]
+    assert following["has_more"] is False
+
+
+def test_ingest_once_and_refresh_when_source_changes(tmp_path: Path) -> None:
+    workspace, csv_path = _workspace(tmp_path)
+    engine = workspace.datasets.engine
+    reference = workspace.datasets.get("orders")
+
+    assert engine.ensure_ingested(reference) is True
+    assert engine.ensure_ingested(reference) is False
+
+    csv_path.write_text("region,amount\nwest,1\n")
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    rows = list(workspace.datasets.iter_query("SELECT region FROM orders", page_size=1))
+    assert rows == [("west",)]
+
+
+def test_codes_keep_leading_zeros_and_table_names_ignore_case(tmp_path: Path) -> None:
+    csv_path = tmp_path / "zips.csv"
+    csv_path.write_text("zip,id,amount\n007,12345678901234567890,1.50\n02134,2,3\n")
+    workspace = Workspace(tmp_path / "state.json")
+    workspace.register_dataset("zips", csv_path)
+
+    page = workspace.query("SELECT zip, id, amount FROM ZIPS ORDER BY amount")
+    assert page["rows"] == [["007", "12345678901234567890", 1.5], ["02134", "2", 3]]
+
+    csv_path.write_text("zip,id,amount\n10001,1,9\n")
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert workspace.query("SELECT zip FROM Zips")["rows"] == [[10001]]
+
+
+def test_queries_cannot_modify_the_cache(tmp_path: Path) -> None:
+    workspace, _ = _workspace(tmp_path)
+    for statement in ("PRAGMA query_only=OFF", "DELETE FROM orders", "ATTACH DATABASE ':memory:' AS other"):
+        with pytest.raises(sqlite3.DatabaseError, match="not authorized"):
+            list(workspace.datasets.iter_query(statement))
+
+    reopened = Workspace(tmp_path / "state.json")
+    assert reopened.query("SELECT COUNT(*) FROM orders")["rows"] == [[4]]
+
+
+def test_cli_query(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _workspace(tmp_path)
+    assert main(["--state", str(tmp_path / "state.json"), "query", "SELECT COUNT(*) AS n FROM orders"]) == 0
+    assert '"n"' in capsys.readouterr().out
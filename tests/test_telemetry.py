@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from paircoding.cli import main
+from paircoding.telemetry import Telemetry, prometheus_text, telemetry
+
+
+def test_disabled_telemetry_records_nothing() -> None:
+    collector = Telemetry()
+    with collector.span("work"):
+        collector.count("calls")
+        collector.observe("size", 10)
+    assert collector.stats() == {"spans": {}, "histograms": {}, "counters": {}}
+
+
+def test_spans_nest_and_export(tmp_path: Path) -> None:
+    collector = Telemetry()
+    collector.enable(trace_path=tmp_path / "trace.jsonl")
+    with collector.span("outer"):
+        with collector.span("inner", rows=3):
+            pass
+    collector.count("calls", 2)
+    collector.disable()
+
+    records = [json.loads(line) for line in (tmp_path / "trace.jsonl").read_text().splitlines()]
+    inner, outer = records
+    assert inner["parent_id"] == outer["span_id"]
+    assert inner["attributes"] == {"rows": 3}
+
+    stats = collector.stats()
+    assert stats["spans"]["outer"]["count"] == 1
+    text = prometheus_text(stats)
+    assert "pairide_calls_total 2" in text
+    assert 'pairide_span_seconds_count{span="inner"} 1' in text
+
+
+def test_cli_profile_and_stats(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    state = str(tmp_path / "state.json")
+    metrics = tmp_path / "metrics.prom"
+    assert main(["--state", state, "--profile", "init"]) == 0
+    assert main(["--state", state, "--metrics", str(metrics), "list", "notebooks"]) == 0
+    assert not telemetry.enabled
+    capsys.readouterr()
+
+    assert main(["--state", state, "stats", "--format", "json"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["spans"]["cli.init"]["count"] == 1
+    assert stats["spans"]["storage.load_state"]["count"] == 2
+    assert stats["histograms"]["storage.state_bytes_written"]["count"] == 1
+    assert 'span="cli.list"' in metrics.read_text()
+
+    assert main(["--state", state, "stats"]) == 0
+    assert "storage.save_state" in capsys.readouterr().out